@@ -1,3 +1,20 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "to", "status", "attempts", "next_attempt_at", "sent_at"]
+    list_filter = ["status"]
+    search_fields = ["subject", "last_error"]
+    readonly_fields = ["created_at", "sent_at", "last_error"]
+    actions = ["retry"]
+
+    @admin.action(description="Retry selected emails")
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=OutboundEmail.SENT).update(
+            status=OutboundEmail.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{count} emails queued again.")
@@ -0,0 +1,166 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+_MISSING = object()
+
+STAT_NAMES = ("local_hits", "shared_hits", "misses", "sets", "deletes")
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+class TieredCache(BaseCache):
+    """
+    A per-process LRU cache in front of a shared cache.
+
+    Reads are answered from process memory when possible and otherwise from
+    the cache named by the SHARED option, keeping a copy locally for
+    LOCAL_TIMEOUT seconds. Writes and deletes go to both. Another worker's
+    delete only reaches this process's copy when it expires, so
+    LOCAL_TIMEOUT bounds how stale a read can be; 0 turns the local tier
+    off and leaves only the stats.
+
+    Keys, prefixes and versions are the shared cache's: ``key`` and
+    ``version`` are passed through unchanged.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.name = location
+        self.shared_alias = options["SHARED"]
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 5)
+        self.local = LocMemCache(
+            f"tiered-{location}",
+            {
+                "TIMEOUT": self.local_timeout,
+                "OPTIONS": {"MAX_ENTRIES": options.get("LOCAL_MAX_ENTRIES", 1000)},
+            },
+        )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def count(self, name, n=1):
+        with _stats_lock:
+            stats = _stats.setdefault(self.name, dict.fromkeys(STAT_NAMES, 0))
+            stats[name] += n
+
+    def get_stats(self):
+        with _stats_lock:
+            stats = dict(_stats.get(self.name) or dict.fromkeys(STAT_NAMES, 0))
+        reads = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_ratio"] = (
+            round((stats["local_hits"] + stats["shared_hits"]) / reads, 4)
+            if reads
+            else None
+        )
+        stats["local_entries"] = len(self.local._cache)
+        return stats
+
+    def keep_local(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.local_timeout:
+            return
+        if timeout == 0:
+            self.local.delete(key, version=version)
+            return
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            timeout = self.local_timeout
+        self.local.set(key, value, min(timeout, self.local_timeout), version=version)
+
+    def get(self, key, default=None, version=None):
+        if self.local_timeout:
+            value = self.local.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                self.count("local_hits")
+                return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self.count("misses")
+            return default
+        self.count("shared_hits")
+        self.keep_local(key, value, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.local.get_many(keys, version=version) if self.local_timeout else {}
+        self.count("local_hits", len(found))
+        rest = [key for key in keys if key not in found]
+        if rest:
+            shared = self.shared.get_many(rest, version=version)
+            self.count("shared_hits", len(shared))
+            self.count("misses", len(rest) - len(shared))
+            for key, value in shared.items():
+                self.keep_local(key, value, version=version)
+            found.update(shared)
+        return found
+
+    def has_key(self, key, version=None):
+        return (
+            self.local_timeout and self.local.has_key(key, version=version)
+        ) or self.shared.has_key(key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.count("sets")
+        self.shared.set(key, value, timeout, version=version)
+        self.keep_local(key, value, timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.count("sets")
+            self.keep_local(key, value, timeout, version=version)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self.count("sets", len(data))
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self.keep_local(key, value, timeout, version=version)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.decr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        self.count("deletes")
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.count("deletes", len(keys))
+        self.local.delete_many(keys, version=version)
+        self.shared.delete_many(keys, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+def get_cache_stats():
+    """The stats of every configured cache that keeps them."""
+    return {
+        alias: caches[alias].get_stats()
+        for alias in settings.CACHES
+        if hasattr(caches[alias], "get_stats")
+    }
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+from .cache import TieredCache
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Warn when a TieredCache's shared tier is process-local outside DEBUG and
+    DEVELOPMENT_MODE: each worker would keep its own copy, and the
+    invalidations one worker makes would never reach the others.
+    """
+    if settings.DEBUG or getattr(settings, "DEVELOPMENT_MODE", False):
+        return []
+    errors = []
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if isinstance(cache, TieredCache) and isinstance(cache.shared, LocMemCache):
+            errors.append(
+                Warning(
+                    f"The shared tier of the '{alias}' cache is process-local.",
+                    hint="Set CACHE_BACKEND to file, redis or memcached so "
+                    "that every worker sees the same cache.",
+                    obj=alias,
+                    id="base.W001",
+                )
+            )
+    return errors
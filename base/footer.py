@@ -0,0 +1,79 @@
+from django.core.cache import cache
+
+from wagtail.models import Page
+
+from base.models import FooterInfo
+from home.models import HomePage
+from services.models import Service
+
+FOOTER_CACHE_KEY = "footer:bundle"
+FOOTER_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def build_footer():
+    """
+    Collect everything the footer tags need: the FooterInfo titles, the home
+    page's live children and the services, as plain picklable values.
+    """
+    instance = FooterInfo.objects.first()
+    homepage = HomePage.objects.first()
+    links = homepage.get_children().live() if homepage else []
+    services = Service.objects.select_related("link")
+
+    return {
+        "links_title": (instance and instance.links_title) or "Useful Links",
+        "services_title": (instance and instance.services_title) or "Our Services",
+        "subscribe_email_title": (instance and instance.subscribe_email_title)
+        or "Join Our Newsletter",
+        "subscribe_email_body": (instance and instance.subscribe_email_body)
+        or "Stay updated on the exlusive list of events that unfold",
+        "home_path": homepage.path if homepage else None,
+        "links": [
+            {"id": link.id, "title": link.title, "url": link.url} for link in links
+        ],
+        "services": [
+            {
+                "title": service.title,
+                "link_id": service.link_id,
+                "url": service.link.url if service.link else None,
+            }
+            for service in services
+        ],
+    }
+
+
+def get_footer(request=None):
+    """
+    Return the footer bundle, memoized on the request so all footer tags
+    share a single cache lookup.
+    """
+    footer = getattr(request, "_footer", None)
+    if footer is None:
+        footer = cache.get(FOOTER_CACHE_KEY)
+        if footer is None:
+            footer = build_footer()
+            cache.set(FOOTER_CACHE_KEY, footer, FOOTER_CACHE_TIMEOUT)
+        if request is not None:
+            request._footer = footer
+    return footer
+
+
+def affects_footer(page):
+    """
+    Whether publishing, unpublishing or deleting ``page`` changes the footer
+    links: it is already linked, from the links or a service, or it is a
+    child of the home page. A changed URL of an ancestor is handled as a
+    move.
+    """
+    footer = cache.get(FOOTER_CACHE_KEY)
+    if footer is None:
+        return True
+    return (
+        page.path[: -Page.steplen] == footer["home_path"]
+        or any(link["id"] == page.id for link in footer["links"])
+        or any(service.get("link_id") == page.id for service in footer["services"])
+    )
+
+
+def invalidate_footer():
+    cache.delete(FOOTER_CACHE_KEY)
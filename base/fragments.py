@@ -0,0 +1,51 @@
+import uuid
+
+from django.core.cache import cache
+from django.utils import translation
+
+from wagtail.models import Site
+
+from base import page_cache
+
+FRAGMENT_VERSION_KEY = "fragments:version:{}"
+
+
+def get_fragment_version(name):
+    """
+    Return the current version token of a cached fragment. Bumping the
+    token makes every cached copy of the fragment unreachable at once,
+    whatever site, locale or path it was stored under.
+    """
+    key = FRAGMENT_VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def fragment_tag(name):
+    return f"fragment:{name}"
+
+
+def get_fragment_key(request, name, vary_on_path=True):
+    # A cached page embeds this fragment whether or not it was rendered.
+    page_cache.record(fragment_tag(name))
+    site = Site.find_for_request(request)
+    parts = [
+        str(site.pk if site else ""),
+        translation.get_language() or "",
+        get_fragment_version(name),
+    ]
+    if vary_on_path:
+        parts.append(request.path)
+    return ":".join(parts)
+
+
+def invalidate_fragments(*names):
+    cache.set_many(
+        {FRAGMENT_VERSION_KEY.format(name): uuid.uuid4().hex for name in names},
+        None,
+    )
+    page_cache.purge(*[fragment_tag(name) for name in names])
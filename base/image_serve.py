@@ -0,0 +1,199 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from wagtail.images.exceptions import InvalidFilterSpecError
+from wagtail.images.models import SourceImageIOError
+from wagtail.images.utils import verify_signature
+from wagtail.images.views.serve import ServeView
+
+SERVED_IMAGE_CACHE_KEY = "images:served:{}"
+SERVED_IMAGE_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# A serve records its use of a file in the file's access time at most this
+# often; prune_cache_dir() never deletes a file used more recently than
+# PRUNE_MIN_AGE, whose path a web server may be about to send.
+USE_RECORD_INTERVAL = 60 * 60 * 24
+PRUNE_MIN_AGE = 60 * 10
+
+
+def get_cache_dir():
+    return getattr(
+        settings,
+        "IMAGE_SERVE_CACHE_DIR",
+        os.path.join(settings.MEDIA_ROOT, "image-cache"),
+    )
+
+
+def store_rendition(rendition):
+    """
+    Copy a rendition's bytes into the on-disk cache under the hash of its
+    content, and return what serving it needs. Identical renditions share
+    one file; a changed image gets a new file and a new ETag.
+    """
+    with rendition.file.open("rb") as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    extension = os.path.splitext(rendition.file.name)[1].lower()
+    relative_path = os.path.join(digest[:2], digest + extension)
+    path = os.path.join(get_cache_dir(), relative_path)
+
+    try:
+        record_use(path)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent readers never see half a file.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(content)
+        os.replace(tmp_path, path)
+
+    return {
+        "path": relative_path,
+        "etag": f'"{digest}"',
+        "last_modified": int(os.path.getmtime(path)),
+        "content_type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+        "size": len(content),
+    }
+
+
+def invalidate_served_image(image_id):
+    """
+    Forget the served renditions of an image and delete their files. A file
+    shared with an identical rendition of another image is copied again on
+    that image's next request.
+    """
+    key = SERVED_IMAGE_CACHE_KEY.format(image_id)
+    served = cache.get(key) or {}
+    cache.delete(key)
+    for entry in served.values():
+        try:
+            os.remove(os.path.join(get_cache_dir(), entry["path"]))
+        except FileNotFoundError:
+            pass
+
+
+def record_use(path):
+    """
+    Mark the cached file at ``path`` as used now by moving its access time,
+    which mounts with noatime never do, unless it was marked within the
+    last USE_RECORD_INTERVAL. Raises FileNotFoundError if it is gone.
+    """
+    now = time.time()
+    stat = os.stat(path)
+    if now - stat.st_atime > USE_RECORD_INTERVAL:
+        os.utime(path, (now, stat.st_mtime))
+
+
+def prune_cache_dir(max_age):
+    """
+    Delete the files in the cache dir not used for ``max_age`` seconds, by
+    the later of their access and modification times, which catches those
+    whose image's entry expired from the cache before it was invalidated.
+    Files used in the last PRUNE_MIN_AGE are always kept. A pruned file
+    still in use is copied again on its next request. Returns the number
+    of files deleted.
+    """
+    cutoff = time.time() - max(max_age, PRUNE_MIN_AGE)
+    deleted = 0
+    for dirpath, dirnames, filenames in os.walk(get_cache_dir(), topdown=False):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+                if max(stat.st_atime, stat.st_mtime) < cutoff:
+                    os.remove(path)
+                    deleted += 1
+            except FileNotFoundError:
+                pass
+        if dirpath != get_cache_dir():
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                # Not empty.
+                pass
+    return deleted
+
+
+class CachedServeView(ServeView):
+    """
+    Serve dynamic image URLs from a content-addressed cache on disk.
+
+    The first request for an image and filter generates the rendition and
+    stores it; later ones only check the signature and answer from the
+    cache, with a strong ETag, Last-Modified and a long max-age, or a 304
+    for conditional requests. With IMAGE_SERVE_SENDFILE set to
+    "x-sendfile" or "x-accel-redirect" the web server sends the file itself.
+    """
+
+    def get(self, request, signature, image_id, filter_spec, filename=None):
+        if not verify_signature(
+            signature.encode(), image_id, filter_spec, key=self.key
+        ):
+            raise PermissionDenied
+
+        key = SERVED_IMAGE_CACHE_KEY.format(image_id)
+        served = cache.get(key) or {}
+        entry = served.get(filter_spec)
+        if entry is not None:
+            try:
+                record_use(os.path.join(get_cache_dir(), entry["path"]))
+            except FileNotFoundError:
+                entry = None
+        if entry is None:
+            image = get_object_or_404(self.model, id=image_id)
+            try:
+                rendition = image.get_rendition(filter_spec)
+            except SourceImageIOError:
+                return HttpResponse(
+                    "Source image file not found", content_type="text/plain", status=410
+                )
+            except InvalidFilterSpecError:
+                return HttpResponse(
+                    "Invalid filter spec: " + filter_spec,
+                    content_type="text/plain",
+                    status=400,
+                )
+            entry = store_rendition(rendition)
+            served[filter_spec] = entry
+            cache.set(key, served, SERVED_IMAGE_CACHE_TIMEOUT)
+
+        response = get_conditional_response(
+            request, etag=entry["etag"], last_modified=entry["last_modified"]
+        )
+        if response is None:
+            response = self.send(entry)
+        response["ETag"] = entry["etag"]
+        response["Last-Modified"] = http_date(entry["last_modified"])
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=getattr(settings, "IMAGE_SERVE_MAX_AGE", 60 * 60 * 24 * 30),
+        )
+        return response
+
+    def send(self, entry):
+        path = os.path.join(get_cache_dir(), entry["path"])
+        mode = getattr(settings, "IMAGE_SERVE_SENDFILE", "")
+        if mode == "x-accel-redirect":
+            response = HttpResponse(content_type=entry["content_type"])
+            prefix = getattr(settings, "IMAGE_SERVE_ACCEL_PREFIX", "/image-cache/")
+            response["X-Accel-Redirect"] = prefix + entry["path"]
+        elif mode == "x-sendfile":
+            response = HttpResponse(content_type=entry["content_type"])
+            response["X-Sendfile"] = path
+        else:
+            response = FileResponse(
+                open(path, "rb"), content_type=entry["content_type"]
+            )
+        return response
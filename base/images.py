@@ -0,0 +1,159 @@
+import importlib.util
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter, Picture
+
+logger = logging.getLogger(__name__)
+
+# How each kind of image on the site is rendered. ``spec`` is the largest
+# rendition the layout needs, ``widths`` the sizes offered in the srcset
+# and ``sizes`` how wide the image is shown. Images used as CSS
+# backgrounds have a single width and format.
+IMAGE_POLICIES = {
+    "post": {
+        "spec": "fill-850x530",
+        "widths": (480, 850),
+        "sizes": "(min-width: 992px) 850px, 100vw",
+    },
+    "author": {
+        "spec": "fill-240x240",
+        "widths": (120, 240),
+        "sizes": "120px",
+    },
+    "block": {
+        "spec": "fill-600x338",
+        "widths": (320, 600),
+        "sizes": "(min-width: 640px) 600px, 100vw",
+    },
+    "thumbnail": {
+        "spec": "fill-160x120",
+        "widths": (160,),
+        "formats": ("webp",),
+    },
+    "cta": {
+        "spec": "fill-1920x1200",
+        "widths": (1920,),
+        "formats": ("webp",),
+    },
+}
+
+SPEC_RE = re.compile(r"^(fill|width|max)-(\d+)(?:x(\d+))?(.*)$")
+
+_executor = None
+
+
+@lru_cache
+def avif_supported():
+    # Willow encodes AVIF through pillow-heif.
+    return importlib.util.find_spec("pillow_heif") is not None
+
+
+def get_fallback_format(image):
+    # Keep transparency for images that may have it.
+    return "png" if image.file.name.lower().endswith((".png", ".gif")) else "jpeg"
+
+
+def get_sized_specs(spec, widths):
+    operation, width, height, rest = SPEC_RE.match(spec).groups()
+    specs = []
+    for size in widths:
+        if height:
+            scaled = round(int(height) * size / int(width))
+            specs.append(f"{operation}-{size}x{scaled}{rest}")
+        else:
+            specs.append(f"{operation}-{size}{rest}")
+    return specs
+
+
+def get_filter_specs(policy, image=None):
+    """
+    The rendition filter specs of ``policy``: every width in every format,
+    modern formats first. Without an ``image`` the specs for both fallback
+    formats are included, for prefetching renditions of any image.
+    """
+    policy = IMAGE_POLICIES[policy]
+    sizes = get_sized_specs(policy["spec"], policy["widths"])
+    if image is not None and image.is_svg():
+        return sizes
+
+    formats = policy.get("formats")
+    if formats is None:
+        formats = ["avif", "webp"] if avif_supported() else ["webp"]
+        if image is None:
+            formats += ["jpeg", "png"]
+        else:
+            formats.append(get_fallback_format(image))
+    return [f"{size}|format-{fmt}" for fmt in formats for size in sizes]
+
+
+def get_picture(image, policy, attrs=None):
+    attrs = dict(attrs or {})
+    sizes = IMAGE_POLICIES[policy].get("sizes")
+    if sizes:
+        attrs.setdefault("sizes", sizes)
+    return Picture(image.get_renditions(*get_filter_specs(policy, image)), attrs)
+
+
+def get_missing_specs(image, specs, existing):
+    """
+    The ``specs`` with no rendition yet for ``image``, given ``existing``
+    as a set of (filter_spec, focal_point_key) pairs.
+    """
+    return [
+        spec
+        for spec in specs
+        if (spec, Filter(spec).get_cache_key(image)) not in existing
+    ]
+
+
+def generate_renditions(image_id, specs=None):
+    """
+    Generate the renditions of ``specs``, or of every policy, for an image
+    and return how many were created. Safe to run in a worker thread or
+    process: it closes the connection it opens.
+    """
+    try:
+        image = get_image_model().objects.filter(pk=image_id).first()
+        if image is None:
+            return 0
+        if specs is None:
+            specs = [
+                spec
+                for policy in IMAGE_POLICIES
+                for spec in get_filter_specs(policy, image)
+            ]
+        existing = set(image.renditions.values_list("filter_spec", "focal_point_key"))
+        missing = get_missing_specs(image, specs, existing)
+        if missing:
+            image.get_renditions(*missing)
+        return len(missing)
+    finally:
+        connection.close()
+
+
+def pregenerate_renditions(image_id):
+    try:
+        generate_renditions(image_id)
+    except Exception:
+        logger.exception("Could not generate renditions for image %s", image_id)
+
+
+def schedule_renditions(image):
+    """
+    Generate ``image``'s renditions in the background once the current
+    transaction commits, so visitors don't wait for them on first view.
+    """
+    global _executor
+    if not getattr(settings, "IMAGE_PREGENERATE_RENDITIONS", False):
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1)
+    image_id = image.pk
+    transaction.on_commit(lambda: _executor.submit(pregenerate_renditions, image_id))
@@ -0,0 +1,124 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# How long a worker may take to send the batch it claimed before other
+# workers treat its emails as abandoned and send them again.
+CLAIM_TIMEOUT = timedelta(minutes=10)
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+
+def queue_email(subject, body, to, from_email=None, reply_to=None):
+    """
+    Store an email for the send_queued_email command to deliver, instead
+    of talking to the mail server during the request.
+    """
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or "",
+        to=list(to),
+        reply_to=list(reply_to or []),
+    )
+
+
+def get_retry_delay(attempts):
+    """Exponential backoff: the base delay, doubled after every attempt."""
+    delay = timedelta(seconds=getattr(settings, "EMAIL_QUEUE_RETRY_DELAY", 60))
+    return min(delay * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def claim_batch(batch_size, now):
+    """
+    Take up to ``batch_size`` due emails, oldest first. Rows locked by
+    another worker are skipped on databases that support it.
+    """
+    with transaction.atomic():
+        emails = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "pk")[:batch_size]
+        )
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + CLAIM_TIMEOUT
+        )
+    return emails
+
+
+def record_failure(email, error, now):
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    if email.attempts >= getattr(settings, "EMAIL_QUEUE_MAX_ATTEMPTS", 8):
+        email.status = OutboundEmail.FAILED
+        logger.error(
+            "Giving up on email %s after %s attempts: %s",
+            email.pk,
+            email.attempts,
+            email.last_error,
+        )
+    else:
+        email.next_attempt_at = now + get_retry_delay(email.attempts)
+        logger.warning(
+            "Could not send email %s, retrying at %s: %s",
+            email.pk,
+            email.next_attempt_at,
+            email.last_error,
+        )
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def send_queued_emails(batch_size=None):
+    """
+    Send one batch of due emails over a single connection and return how
+    many were sent and how many failed. Failures are retried with backoff
+    until EMAIL_QUEUE_MAX_ATTEMPTS, then left as failed for an admin to
+    look at.
+    """
+    now = timezone.now()
+    batch_size = batch_size or getattr(settings, "EMAIL_QUEUE_BATCH_SIZE", 50)
+    emails = claim_batch(batch_size, now)
+    if not emails:
+        return 0, 0
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            record_failure(email, error, now)
+        return 0, len(emails)
+
+    sent = failed = 0
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject,
+                email.body,
+                email.from_email or None,
+                email.to,
+                reply_to=email.reply_to or None,
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as error:
+                record_failure(email, error, now)
+                failed += 1
+                continue
+            email.status = OutboundEmail.SENT
+            email.attempts += 1
+            email.sent_at = timezone.now()
+            email.last_error = ""
+            email.save(update_fields=["status", "attempts", "sent_at", "last_error"])
+            sent += 1
+    finally:
+        connection.close()
+    return sent, failed
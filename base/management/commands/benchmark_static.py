@@ -0,0 +1,158 @@
+import os
+import statistics
+import time
+import urllib.request
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from whitenoise import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+ENCODINGS = {
+    "identity": "identity",
+    "gzip": "gzip",
+    "br": "br, gzip",
+}
+
+
+def collected_files(root):
+    """The URL paths, relative to STATIC_URL, of the files in ``root``."""
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith((".br", ".gz")) or filename == "staticfiles.json":
+                continue
+            path = os.path.join(directory, filename)
+            yield os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def fetch_wsgi(application, url, accept_encoding):
+    """
+    Request ``url`` from a WSGI application and return the time to the
+    first body byte, the body size and the response headers.
+    """
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": url,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_ACCEPT_ENCODING": accept_encoding,
+        "wsgi.url_scheme": "http",
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": BytesIO(),
+    }
+    headers = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        headers.update((name.lower(), value) for name, value in response_headers)
+
+    start = time.perf_counter()
+    body = application(environ, start_response)
+    ttfb = None
+    size = 0
+    try:
+        for chunk in body:
+            if ttfb is None:
+                ttfb = time.perf_counter() - start
+            size += len(chunk)
+    finally:
+        if hasattr(body, "close"):
+            body.close()
+    return ttfb or time.perf_counter() - start, size, headers
+
+
+def fetch_http(url, accept_encoding):
+    """Like fetch_wsgi(), over the network against a running server."""
+    request = urllib.request.Request(url, headers={"Accept-Encoding": accept_encoding})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        first = response.read(1)
+        ttfb = time.perf_counter() - start
+        size = len(first) + len(response.read())
+        headers = {name.lower(): value for name, value in response.getheaders()}
+    return ttfb, size, headers
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare bytes transferred and time to first byte for the collected "
+        "static files, uncompressed against gzip and Brotli. Run it after "
+        "collectstatic; with --base-url it measures a running server instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            help="Fetch from this server (e.g. https://example.com) instead of in-process.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Requests per file and encoding; the median TTFB is reported.",
+        )
+        parser.add_argument(
+            "--extensions",
+            default=".css,.js,.svg,.json,.html,.txt",
+            help="Comma-separated file extensions to include.",
+        )
+
+    def handle(self, *args, **options):
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            raise CommandError("STATIC_ROOT does not exist, run collectstatic first.")
+
+        extensions = tuple(options["extensions"].split(","))
+        paths = sorted(p for p in collected_files(root) if p.endswith(extensions))
+        if not paths:
+            raise CommandError("No collected files match --extensions.")
+
+        if options["base_url"]:
+            base = options["base_url"].rstrip("/") + settings.STATIC_URL
+
+            def fetch(path, accept_encoding):
+                return fetch_http(base + path, accept_encoding)
+
+        else:
+            # Serve through the middleware's own files, so the headers are
+            # the ones production sends.
+            middleware = WhiteNoiseMiddleware(get_response=None)
+
+            def application(environ, start_response):
+                url = environ["PATH_INFO"]
+                static_file = middleware.files.get(url) or middleware.find_file(url)
+                return WhiteNoise.serve(static_file, environ, start_response)
+
+            def fetch(path, accept_encoding):
+                return fetch_wsgi(application, settings.STATIC_URL + path, accept_encoding)
+
+        totals = {name: [0, []] for name in ENCODINGS}
+        encoded = {name: 0 for name in ENCODINGS}
+        for path in paths:
+            row = []
+            for name, accept_encoding in ENCODINGS.items():
+                timings = []
+                for _ in range(max(1, options["repeat"])):
+                    ttfb, size, headers = fetch(path, accept_encoding)
+                    timings.append(ttfb)
+                ttfb = statistics.median(timings)
+                totals[name][0] += size
+                totals[name][1].append(ttfb)
+                if headers.get("content-encoding", "identity") != "identity":
+                    encoded[name] += 1
+                row.append(f"{name} {size:>9,} B {ttfb * 1000:7.2f} ms")
+            self.stdout.write(f"{path}\n    " + " | ".join(row))
+            if options["verbosity"] > 1:
+                self.stdout.write(f"    cache-control: {headers.get('cache-control')}")
+
+        self.stdout.write("")
+        identity_bytes = totals["identity"][0] or 1
+        for name, (size, timings) in totals.items():
+            self.stdout.write(
+                f"{name:>8}: {size:>11,} B ({size / identity_bytes:6.1%}), "
+                f"median TTFB {statistics.median(timings) * 1000:.2f} ms, "
+                f"{encoded[name]}/{len(paths)} files compressed"
+            )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from base.image_serve import SERVED_IMAGE_CACHE_TIMEOUT, prune_cache_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the files in the served image cache (IMAGE_SERVE_CACHE_DIR) "
+        "that have not been used for --days, such as those of replaced or "
+        "deleted images and of filter specs no longer used."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=SERVED_IMAGE_CACHE_TIMEOUT / (60 * 60 * 24),
+            help="Days without use after which files are deleted (default: 30).",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_cache_dir(options["days"] * 60 * 60 * 24)
+        self.stdout.write(f"Deleted {deleted} files")
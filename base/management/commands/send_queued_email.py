@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from base.mail import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the emails queued by the contact form and form pages. Runs "
+        "until the queue has nothing due, or with --loop keeps polling it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Emails sent per connection (default: EMAIL_QUEUE_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, checking the queue every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait when nothing is due (default: 5).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_emails(options["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed")
+                continue
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
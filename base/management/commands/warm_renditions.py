@@ -0,0 +1,167 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from wagtail.blocks import ListBlock, StreamBlock, StructBlock
+from wagtail.fields import StreamField
+from wagtail.images import get_image_model
+from wagtail.images.blocks import ImageChooserBlock
+from wagtail.models import get_page_models
+
+from base.images import generate_renditions, get_filter_specs, get_missing_specs
+from blog.models import BlogPage
+from home.models import HomePage
+
+
+def block_image_ids(block, value):
+    """
+    The ids of the images chosen anywhere in ``value``, the raw data of
+    ``block``, looking inside StreamBlocks, StructBlocks and ListBlocks.
+    """
+    if not value:
+        return
+    if isinstance(block, ImageChooserBlock):
+        yield value
+    elif isinstance(block, StreamBlock):
+        for child in value:
+            child_block = block.child_blocks.get(child["type"])
+            if child_block is not None:
+                yield from block_image_ids(child_block, child["value"])
+    elif isinstance(block, StructBlock):
+        for name, child_block in block.child_blocks.items():
+            yield from block_image_ids(child_block, value.get(name))
+    elif isinstance(block, ListBlock):
+        for item in value:
+            # Items have been stored as {"type": "item", "value": ...} since
+            # Wagtail 2.16; older revisions hold the bare values.
+            if isinstance(item, dict) and item.get("type") == "item":
+                item = item.get("value")
+            yield from block_image_ids(block.child_block, item)
+
+
+def stream_image_ids(page):
+    """The image ids of the images in any of ``page``'s StreamFields."""
+    for field in page._meta.get_fields():
+        if isinstance(field, StreamField):
+            value = getattr(page, field.name)
+            if value:
+                yield from block_image_ids(field.stream_block, list(value.raw_data))
+
+
+def discover(page):
+    """
+    Yield (image id, policy) for every image ``page`` renders, following the
+    policies its templates use in base.images.IMAGE_POLICIES.
+    """
+    if isinstance(page, HomePage):
+        if page.cta_image_id:
+            yield page.cta_image_id, "cta"
+    elif isinstance(page, BlogPage):
+        if page.image_id:
+            # The post page and listing cards, and the latest posts sidebar.
+            yield page.image_id, "post"
+            yield page.image_id, "thumbnail"
+        for relation in page.blog_author_relationship.all():
+            if relation.author.image_id:
+                yield relation.author.image_id, "author"
+    # A BlogListing shows its posts' images, which their own pages cover.
+    for image_id in stream_image_ids(page):
+        yield image_id, "block"
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the missing image renditions of every live page ahead of "
+        "time. Finished renditions are skipped, so an interrupted run can "
+        "simply be started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the renditions that would be generated, without generating them.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of processes generating renditions (default: one per CPU).",
+        )
+
+    def handle(self, *args, **options):
+        policies = {}
+        for model in get_page_models():
+            pages = model.objects.live().exact_type(model)
+            if model is BlogPage:
+                pages = pages.prefetch_related("blog_author_relationship__author")
+            count = 0
+            for page in pages.iterator(chunk_size=200):
+                for image_id, policy in discover(page):
+                    policies.setdefault(image_id, set()).add(policy)
+                count += 1
+            self.stdout.write(f"{model.__name__}: {count} live pages")
+
+        work = self.plan(policies)
+        total = sum(len(specs) for specs in work.values())
+        self.stdout.write(
+            f"{len(policies)} images, {total} renditions missing "
+            f"across {len(work)} images"
+        )
+
+        if options["dry_run"]:
+            for image_id, specs in work.items():
+                for spec in specs:
+                    self.stdout.write(f"  image {image_id}: {spec}")
+            return
+        if not work:
+            return
+
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        created = done = 0
+        workers = max(1, options["workers"])
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(generate_renditions, image_id, specs): image_id
+                for image_id, specs in work.items()
+            }
+            for future in as_completed(futures):
+                image_id = futures[future]
+                done += 1
+                try:
+                    count = future.result()
+                except Exception as error:
+                    self.stderr.write(f"[{done}/{len(work)}] image {image_id}: {error}")
+                    continue
+                created += count
+                self.stdout.write(
+                    f"[{done}/{len(work)}] image {image_id}: {count} renditions"
+                )
+        self.stdout.write(self.style.SUCCESS(f"Generated {created} renditions"))
+
+    def plan(self, policies):
+        """Map each image id to the filter specs it has no rendition for."""
+        Image = get_image_model()
+        Rendition = Image.get_rendition_model()
+        existing = {}
+        for image_id, filter_spec, focal_point_key in Rendition.objects.filter(
+            image_id__in=policies
+        ).values_list("image_id", "filter_spec", "focal_point_key"):
+            existing.setdefault(image_id, set()).add((filter_spec, focal_point_key))
+
+        work = {}
+        for image in Image.objects.filter(pk__in=policies).order_by("pk"):
+            specs = [
+                spec
+                for policy in sorted(policies[image.pk])
+                for spec in get_filter_specs(policy, image)
+            ]
+            missing = get_missing_specs(image, specs, existing.get(image.pk, set()))
+            if missing:
+                work[image.pk] = missing
+        return work
@@ -0,0 +1,73 @@
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from .cache import get_cache_stats
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_local = threading.local()
+_started = time.time()
+_counters = {
+    "requests": 0,
+    "connections_opened": 0,
+    "requests_opening_connection": 0,
+}
+
+
+def _increment(name):
+    with _lock:
+        _counters[name] += 1
+        return _counters[name]
+
+
+def connection_opened(alias):
+    _increment("connections_opened")
+    _local.opened_connection = True
+
+
+def request_started():
+    _local.opened_connection = False
+
+
+def request_finished():
+    requests = _increment("requests")
+    if getattr(_local, "opened_connection", False):
+        _increment("requests_opening_connection")
+    every = getattr(settings, "METRICS_LOG_EVERY", 0)
+    if every and requests % every == 0:
+        logger.info("worker metrics %s", get_metrics())
+
+
+def get_metrics():
+    """
+    This worker process's database and cache counters. Each gunicorn worker keeps its own, so
+    they describe whichever worker answered the request that read them.
+    """
+    with _lock:
+        database = dict(_counters)
+    requests = database.pop("requests")
+    database["open_connections"] = [
+        connection.alias
+        for connection in connections.all(initialized_only=True)
+        if connection.connection is not None
+    ]
+    # The share of requests that paid for a new connection; with persistent
+    # connections this drops towards zero once the worker is warm.
+    database["connect_ratio"] = (
+        round(database["requests_opening_connection"] / requests, 4)
+        if requests
+        else None
+    )
+    return {
+        "pid": os.getpid(),
+        "uptime": round(time.time() - _started),
+        "requests": requests,
+        "database": database,
+        "caches": get_cache_stats(),
+    }
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from modelcluster.fields import ParentalKey
@@ -58,6 +59,11 @@ class StandardPage(Page):
         FieldPanel("body"),
     ]
 
+    search_fields = Page.search_fields + [
+        index.SearchField("introduction", boost=1.5),
+        index.SearchField("body"),
+    ]
+
     page_description = "This page type allows you to create standard content pages with an introduction and a flexible body."
 
 
@@ -88,6 +94,11 @@ class FormPage(AbstractEmailForm):
         help_text="Customize the message displayed to users after submitting the form.",
     )
 
+    search_fields = AbstractEmailForm.search_fields + [
+        index.SearchField("introduction", boost=1.5),
+        index.SearchField("body"),
+    ]
+
     content_panels = AbstractEmailForm.content_panels + [
         FieldPanel("introduction"),
         FieldPanel("body"),
@@ -104,6 +115,18 @@ class FormPage(AbstractEmailForm):
 
     page_description = "Create interactive forms with ease. Customize the page with images, introductions, and a flexible body. Manage form fields, set email notifications, and provide a personalized thank-you message."
 
+    def send_mail(self, form):
+        # Queued rather than sent during the request; see base/mail.py.
+        from .mail import queue_email
+
+        addresses = [x.strip() for x in self.to_address.split(",")]
+        queue_email(
+            self.subject,
+            self.render_email(form),
+            addresses,
+            from_email=self.from_address,
+        )
+
 
 @register_snippet
 class FooterInfo(models.Model):
@@ -209,3 +232,38 @@ class GenericSettings(ClusterableModel, BaseGenericSetting):
             "Email & Phone",
         ),
     ]
+
+
+class OutboundEmail(models.Model):
+    """
+    An email waiting to be sent, or sent, by the send_queued_email command.
+    See base/mail.py.
+    """
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Outbound email"
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
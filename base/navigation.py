@@ -0,0 +1,119 @@
+from django.core.cache import cache
+
+from wagtail.models import Page, Site
+
+MENU_CACHE_KEY = "navigation:menu:{}"
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+
+# The header renders three levels: top menu, dropdown and deep dropdown.
+MENU_DEPTH = 3
+
+
+class MenuItem:
+    """
+    A lightweight, picklable stand-in for a live, in-menu page, so the
+    header can be rendered from the cache without touching the database.
+    """
+
+    def __init__(self, page, url):
+        self.id = page.id
+        self.title = page.title
+        self.slug = page.slug
+        self.path = page.path
+        self.url_path = page.url_path
+        self.url = url
+        self.children = []
+
+    @property
+    def show_dropdown(self):
+        return bool(self.children)
+
+    def __str__(self):
+        return self.title
+
+
+def build_menu_tree(site):
+    """
+    Load the live, in-menu subtree of the site root in a single query and
+    return it as a dict of MenuItems keyed by url_path.
+    """
+    root = site.root_page
+    root_item = MenuItem(root, root.relative_url(site))
+    items = {root.url_path: root_item}
+    parents = {root.path: root_item}
+
+    pages = (
+        Page.objects.descendant_of(root)
+        .live()
+        .in_menu()
+        .filter(depth__lte=root.depth + MENU_DEPTH)
+        .order_by("path")
+    )
+    for page in pages:
+        # Pages are ordered by path, so a parent is always seen before its
+        # children. A missing parent means an ancestor is hidden from menus.
+        parent = parents.get(page.path[: -Page.steplen])
+        if parent is None:
+            continue
+        item = MenuItem(page, page.relative_url(site))
+        parent.children.append(item)
+        parents[page.path] = item
+        items[page.url_path] = item
+    return items
+
+
+def get_menu_tree(site):
+    key = MENU_CACHE_KEY.format(site.pk)
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_menu_tree(site)
+        cache.set(key, tree, MENU_CACHE_TIMEOUT)
+    return tree
+
+
+def get_menu_root(request):
+    site = Site.find_for_request(request)
+    if site is None:
+        return None
+    tree = get_menu_tree(site)
+    return next(iter(tree.values()))
+
+
+def get_menu_children(request, parent):
+    """
+    Return the menu children of ``parent``, which may be a MenuItem from
+    an enclosing menu tag or a regular Page.
+    """
+    if isinstance(parent, MenuItem):
+        return parent.children
+    site = Site.find_for_request(request)
+    if site is None:
+        return []
+    item = get_menu_tree(site).get(parent.url_path)
+    return item.children if item else []
+
+
+def affects_menu(page):
+    """
+    Whether publishing, unpublishing or deleting ``page`` changes any cached
+    menu: it is already listed, or it would be listed under a menu item.
+    """
+    keys = [
+        MENU_CACHE_KEY.format(pk) for pk in Site.objects.values_list("pk", flat=True)
+    ]
+    trees = cache.get_many(keys)
+    if len(trees) < len(keys):
+        # Cached fragments may outlive an evicted tree; assume the worst.
+        return True
+    parent_path = page.path[: -Page.steplen]
+    return any(
+        item.id == page.id or (page.show_in_menus and item.path == parent_path)
+        for tree in trees.values()
+        for item in tree.values()
+    )
+
+
+def invalidate_menu_trees():
+    cache.delete_many(
+        [MENU_CACHE_KEY.format(pk) for pk in Site.objects.values_list("pk", flat=True)]
+    )
@@ -0,0 +1,186 @@
+import hashlib
+import re
+import uuid
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from wagtail.models import Page, Site
+
+from base.models import GenericSettings, SiteSettings
+
+PAGE_CACHE_ENTRY_KEY = "pagecache:entry:{}"
+PAGE_CACHE_TAG_VERSION_KEY = "pagecache:tag:version:{}"
+
+CSRF_PLACEHOLDER = b"__pagecache_csrf_token__"
+CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+_recorded_tags = ContextVar("page_cache_tags", default=None)
+
+
+def object_tag(model, pk):
+    if issubclass(model, Page):
+        return f"page:{pk}"
+    return f"{model._meta.label_lower}:{pk}"
+
+
+def tag_for(obj):
+    return object_tag(type(obj), obj.pk)
+
+
+def model_tag(model):
+    return model._meta.label_lower
+
+
+def get_tag_versions(tags):
+    """
+    The current version token of each of ``tags``. ``purge()`` replaces
+    them, which invalidates every entry stored under the old ones.
+    """
+    keys = {PAGE_CACHE_TAG_VERSION_KEY.format(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, tag in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+        versions[tag] = version
+    return versions
+
+
+def record(*tags):
+    """
+    Note that the response being rendered depends on ``tags``. Outside of
+    a cached page render this does nothing.
+    """
+    collected = _recorded_tags.get()
+    if collected is not None:
+        # Read now, so a purge during the render invalidates the entry.
+        new_tags = {tag for tag in tags if tag and tag not in collected}
+        if new_tags:
+            collected.update(get_tag_versions(new_tags))
+
+
+def is_enabled():
+    return getattr(settings, "PAGE_CACHE_ENABLED", False)
+
+
+def is_cacheable_request(request):
+    user = getattr(request, "user", None)
+    return (
+        request.method in ("GET", "HEAD")
+        and not getattr(request, "is_preview", False)
+        and not (user and user.is_authenticated)
+        # A pending flash message must be rendered for this visitor only.
+        and "messages" not in request.COOKIES
+    )
+
+
+def is_cacheable_response(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and "private" not in response.get("Cache-Control", "")
+    )
+
+
+def get_cache_key(request):
+    site = Site.find_for_request(request)
+    path = request.get_full_path()
+    digest = hashlib.md5(path.encode(), usedforsecurity=False).hexdigest()
+    return PAGE_CACHE_ENTRY_KEY.format(f"{site.pk if site else ''}:{digest}")
+
+
+def store(key, response, versions):
+    # The CSRF token is per visitor; keep a placeholder in the stored body
+    # and fill in the current visitor's token when serving a hit.
+    content = CSRF_INPUT_RE.sub(
+        rb"\g<1>" + CSRF_PLACEHOLDER + rb"\g<2>", response.content
+    )
+    entry = {
+        "status": response.status_code,
+        "headers": list(response.items()),
+        "content": content,
+        "versions": versions,
+    }
+    cache.set(key, entry, getattr(settings, "PAGE_CACHE_TIMEOUT", 60 * 60))
+
+
+def is_current(entry):
+    """Whether none of the tags ``entry`` was stored under has been purged."""
+    versions = entry["versions"]
+    current = cache.get_many(
+        [PAGE_CACHE_TAG_VERSION_KEY.format(tag) for tag in versions]
+    )
+    return all(
+        current.get(PAGE_CACHE_TAG_VERSION_KEY.format(tag)) == version
+        for tag, version in versions.items()
+    )
+
+
+def restore(request, entry):
+    content = entry["content"]
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+    response = HttpResponse(content, status=entry["status"])
+    for header, value in entry["headers"]:
+        response[header] = value
+    response["X-Page-Cache"] = "hit"
+    return response
+
+
+def purge(*tags):
+    """
+    Invalidate every cached response that recorded any of ``tags`` by
+    dropping their version tokens; the stale entries expire on their own.
+    """
+    tag_keys = [PAGE_CACHE_TAG_VERSION_KEY.format(tag) for tag in tags if tag]
+    if tag_keys:
+        cache.delete_many(tag_keys)
+
+
+class CachedPageMixin:
+    """
+    Serve anonymous GET requests for a page model from a whole-response
+    cache. Enabled with the PAGE_CACHE_ENABLED setting.
+
+    While the page renders, templates, tags and models call ``record()``
+    with the objects they read; the entry is stored with those tags'
+    version tokens, and ``purge()`` replacing any of them invalidates it.
+    """
+
+    def get_cache_tags(self):
+        return [
+            tag_for(self),
+            model_tag(SiteSettings),
+            model_tag(GenericSettings),
+        ]
+
+    def serve(self, request, *args, **kwargs):
+        if not (is_enabled() and is_cacheable_request(request)):
+            return super().serve(request, *args, **kwargs)
+
+        key = get_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None and is_current(entry):
+            return restore(request, entry)
+
+        token = _recorded_tags.set(get_tag_versions(self.get_cache_tags()))
+        try:
+            response = super().serve(request, *args, **kwargs)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+            versions = _recorded_tags.get()
+        finally:
+            _recorded_tags.reset(token)
+
+        if is_cacheable_response(response):
+            store(key, response, versions)
+            response["X-Page-Cache"] = "miss"
+        return response
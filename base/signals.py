@@ -0,0 +1,146 @@
+from django.core.signals import request_finished, request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from taggit.models import Tag
+
+from wagtail.images import get_image_model
+from wagtail.models import Page, Site
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+
+from blog.models import Author, Category
+from features.models import Feature
+from pricing.models import PricingFeature
+from services.models import Service
+
+from . import metrics, page_cache
+from .footer import affects_footer, invalidate_footer
+from .fragments import invalidate_fragments
+from .image_serve import invalidate_served_image
+from .images import schedule_renditions
+from .models import FooterInfo, GenericSettings, SiteSettings
+from .navigation import affects_menu, invalidate_menu_trees
+from .sites import invalidate_site_resolution
+
+
+def page_changed(page, moved=False):
+    fragments = []
+    if moved or affects_menu(page):
+        invalidate_menu_trees()
+        fragments.append("header")
+    if moved or affects_footer(page):
+        invalidate_footer()
+        fragments.append("footer")
+    invalidate_fragments(*fragments)
+    page_cache.purge(
+        page_cache.tag_for(page), page_cache.model_tag(page.specific_class)
+    )
+    # Resolved sites hold their root page.
+    if moved or Site.objects.filter(root_page_id=page.pk).exists():
+        invalidate_site_resolution()
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def page_published_or_unpublished(sender, instance, **kwargs):
+    page_changed(instance)
+
+
+@receiver(post_page_move)
+@receiver(page_slug_changed)
+def page_moved(sender, instance, **kwargs):
+    # A new slug changes the URLs of the page and everything below it, which
+    # the menus and footer may link to, just like a move.
+    page_changed(instance, moved=True)
+
+
+@receiver(post_delete)
+def page_deleted(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        page_changed(instance)
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def site_changed(sender, instance, **kwargs):
+    invalidate_site_resolution()
+    invalidate_menu_trees()
+    invalidate_fragments("header", "footer")
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def site_settings_changed(sender, instance, created=False, **kwargs):
+    # Settings are created by their first lookup, so a new row replaces
+    # nothing that was resolved.
+    if not created:
+        invalidate_site_resolution()
+    invalidate_fragments("header")
+    page_cache.purge(page_cache.model_tag(SiteSettings))
+
+
+@receiver(post_save, sender=FooterInfo)
+@receiver(post_delete, sender=FooterInfo)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def footer_snippet_changed(sender, instance, **kwargs):
+    invalidate_footer()
+    invalidate_fragments("footer")
+    page_cache.purge(page_cache.tag_for(instance))
+
+
+@receiver(post_save, sender=GenericSettings)
+@receiver(post_delete, sender=GenericSettings)
+def generic_settings_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        invalidate_site_resolution()
+    invalidate_fragments("footer")
+    page_cache.purge(page_cache.model_tag(GenericSettings))
+
+
+@receiver(post_save, sender=Feature)
+@receiver(post_delete, sender=Feature)
+@receiver(post_save, sender=PricingFeature)
+@receiver(post_delete, sender=PricingFeature)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=get_image_model())
+@receiver(post_delete, sender=get_image_model())
+def snippet_changed(sender, instance, **kwargs):
+    page_cache.purge(page_cache.tag_for(instance), page_cache.model_tag(sender))
+
+
+@receiver(post_save, sender=get_image_model())
+def image_saved(sender, instance, **kwargs):
+    invalidate_served_image(instance.pk)
+    schedule_renditions(instance)
+
+
+@receiver(post_delete, sender=get_image_model())
+def image_deleted(sender, instance, **kwargs):
+    invalidate_served_image(instance.pk)
+
+
+@receiver(connection_created)
+def database_connection_created(sender, connection, **kwargs):
+    metrics.connection_opened(connection.alias)
+
+
+@receiver(request_started)
+def request_started_metrics(sender, **kwargs):
+    metrics.request_started()
+
+
+@receiver(request_finished)
+def request_finished_metrics(sender, **kwargs):
+    metrics.request_finished()
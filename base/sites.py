@@ -0,0 +1,105 @@
+import copy
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.http.request import split_domain_port
+
+from wagtail.models import Site
+
+from .models import GenericSettings, SiteSettings
+
+SITE_RESOLUTION_VERSION_KEY = "sites:version"
+
+# Any Host header can reach the site when ALLOWED_HOSTS is open, so only
+# this many host and port pairs are remembered.
+MAX_RESOLVED_HOSTS = 100
+
+_MISSING = object()
+
+_lock = threading.Lock()
+_resolved = {"version": None, "sites": {}, "settings": {}}
+
+
+def get_resolution_version():
+    """
+    The current version token of the resolved sites and settings. Every
+    worker compares it with the one its own copies were made under, so an
+    invalidation in one process reaches all of them.
+    """
+    version = cache.get(SITE_RESOLUTION_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(SITE_RESOLUTION_VERSION_KEY, version, None):
+            version = cache.get(SITE_RESOLUTION_VERSION_KEY, version)
+    return version
+
+
+def invalidate_site_resolution():
+    global _resolved
+    cache.delete(SITE_RESOLUTION_VERSION_KEY)
+    with _lock:
+        _resolved = {"version": None, "sites": {}, "settings": {}}
+
+
+def get_resolved():
+    global _resolved
+    version = get_resolution_version()
+    with _lock:
+        if _resolved["version"] != version:
+            _resolved = {"version": version, "sites": {}, "settings": {}}
+        return _resolved
+
+
+def resolve_site(request):
+    """
+    Resolve the Site and the site and generic settings for ``request``
+    from this process's copies, and memoize them on the request where
+    Site.find_for_request(), the settings context processor and
+    Setting.for_request() look first.
+    """
+    resolved = get_resolved()
+    host = (split_domain_port(request.get_host())[0], request.get_port())
+    site = resolved["sites"].get(host, _MISSING)
+    if site is _MISSING:
+        site = Site._find_for_request(request)
+        if len(resolved["sites"]) < MAX_RESOLVED_HOSTS:
+            resolved["sites"][host] = site
+    if site is not None:
+        # Each request loads its own root page: routing reads its numchild,
+        # which a page shared between requests would keep from the first.
+        site = copy.copy(site)
+        site._state.fields_cache.pop("root_page", None)
+    request._wagtail_site = site
+
+    if site is not None:
+        key = (SiteSettings, site.pk)
+        site_settings = resolved["settings"].get(key)
+        if site_settings is None:
+            site_settings = resolved["settings"][key] = SiteSettings.for_site(site)
+        # Each request gets its own copy: Wagtail keeps the request on it.
+        site_settings = copy.copy(site_settings)
+        site_settings._request = request
+        setattr(request, SiteSettings.get_cache_attr_name(), site_settings)
+
+    generic_settings = resolved["settings"].get(GenericSettings)
+    if generic_settings is None:
+        generic_settings = resolved["settings"][GenericSettings] = GenericSettings.load()
+    generic_settings = copy.copy(generic_settings)
+    generic_settings._request = request
+    setattr(request, GenericSettings.get_cache_attr_name(), generic_settings)
+    return site
+
+
+class SiteResolutionMiddleware:
+    """
+    Resolve the site and its settings once per request, before anything
+    that needs them: page serving, template tags and context processors.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        resolve_site(request)
+        return self.get_response(request)
@@ -0,0 +1,20 @@
+from django import template
+
+from base.images import get_picture
+from base.page_cache import record, tag_for
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, policy, **attrs):
+    """
+    Render ``image`` as a <picture> with a srcset per format, sized by the
+    named policy in base.images.IMAGE_POLICIES. Extra keyword arguments
+    become attributes of the <img>.
+    """
+    if not image:
+        return ""
+    record(tag_for(image))
+    return get_picture(image, policy, attrs).__html__()
@@ -1,8 +1,9 @@
 from django import template
-from wagtail.models import Page, Site
-from base.models import FooterInfo
-from home.models import HomePage
-from services.models import Service
+from wagtail.models import Page
+from base.footer import get_footer
+from base.fragments import get_fragment_key
+from base.navigation import get_menu_children, get_menu_root
+from base.sites import resolve_site
 
 
 register = template.Library()
@@ -10,50 +11,44 @@ register = template.Library()
 
 @register.simple_tag(takes_context=True)
 def get_site_root(context):
-    return Site.find_for_request(context["request"]).root_page
-
-
-def has_menu_children(page):
-    return page.get_children().live().in_menu().exists()
+    request = context["request"]
+    site = getattr(request, "_wagtail_site", None) or resolve_site(request)
+    return site.root_page if site else None
 
 
 def has_children(page):
     return page.get_children().live().exists()
 
+
+@register.simple_tag(takes_context=True)
+def fragment_cache_key(context, name, vary_on_path=True):
+    return get_fragment_key(context["request"], name, vary_on_path)
+
 @register.simple_tag(takes_context=False)
 def is_active(page, current_page):
     return current_page.url_path.startswith(page.url_path) if current_page else False
 
 
 @register.inclusion_tag("tags/top_menu.html", takes_context=True)
-def top_menu(context, parent, calling_page=None):
-    menuitems = parent.get_children().live().in_menu()
+def top_menu(context, parent=None, calling_page=None):
+    request = context["request"]
+    if parent is None:
+        parent = get_menu_root(request)
+    menuitems = get_menu_children(request, parent) if parent else []
     for menuitem in menuitems:
-        menuitem.show_dropdown = has_menu_children(menuitem)
-        menuitem.active = (
-            calling_page.url_path.startswith(menuitem.url_path)
-            if calling_page
-            else False
-        )
+        menuitem.active = is_active(menuitem, calling_page)
     return {
         "calling_page": calling_page,
         "menuitems": menuitems,
-        "request": context["request"],
+        "request": request,
     }
 
 
 @register.inclusion_tag("tags/top_menu_children.html", takes_context=True)
 def top_menu_children(context, parent, calling_page=None):
-    menuitems_children = parent.get_children()
-    menuitems_children = menuitems_children.live().in_menu()
+    menuitems_children = get_menu_children(context["request"], parent)
     for menuitem in menuitems_children:
-        menuitem.has_dropdown = has_menu_children(menuitem)
-        menuitem.active = (
-            calling_page.url_path.startswith(menuitem.url_path)
-            if calling_page
-            else False
-        )
-        menuitem.children = menuitem.get_children().live().in_menu()
+        menuitem.active = is_active(menuitem, calling_page)
     return {
         "parent": parent,
         "menuitems_children": menuitems_children,
@@ -63,11 +58,9 @@ def top_menu_children(context, parent, calling_page=None):
 
 @register.inclusion_tag("tags/deep_dropdown_children.html", takes_context=True)
 def deep_dropdown_children(context, parent, calling_page=None):
-    deep_dropdown_children = parent.get_children().live().in_menu()
+    deep_dropdown_children = get_menu_children(context["request"], parent)
     for item in deep_dropdown_children:
-        item.active = (
-            calling_page.url_path.startswith(item.url_path) if calling_page else False
-        )
+        item.active = is_active(item, calling_page)
     return {
         "parent": parent,
         "deep_dropdown_children": deep_dropdown_children,
@@ -92,8 +85,7 @@ def breadcrumbs(context):
 def get_footer_links_title(context):
     footer_links_title = context.get("footer_links_title", "")
     if not footer_links_title:
-        instance = FooterInfo.objects.first()
-        footer_links_title = instance.links_title if instance else "Useful Links"
+        footer_links_title = get_footer(context.get("request"))["links_title"]
     return {"footer_links_title": footer_links_title}
 
 
@@ -101,8 +93,7 @@ def get_footer_links_title(context):
 def get_footer_services_title(context):
     footer_services_title = context.get("footer_services_title", "")
     if not footer_services_title:
-        instance = FooterInfo.objects.first()
-        footer_services_title = instance.services_title if instance else "Our Services"
+        footer_services_title = get_footer(context.get("request"))["services_title"]
     return {"footer_services_title": footer_services_title}
 
 
@@ -112,10 +103,9 @@ def get_footer_services_title(context):
 def get_footer_subscribe_email_title(context):
     footer_subscribe_email_title = context.get("footer_subscribe_email_title", "")
     if not footer_subscribe_email_title:
-        instance = FooterInfo.objects.first()
-        footer_subscribe_email_title = (
-            instance.subscribe_email_title if instance else "Join Our Newsletter"
-        )
+        footer_subscribe_email_title = get_footer(context.get("request"))[
+            "subscribe_email_title"
+        ]
     return {"footer_subscribe_email_title": footer_subscribe_email_title}
 
 
@@ -125,23 +115,17 @@ def get_footer_subscribe_email_title(context):
 def get_footer_subscribe_email_body(context):
     footer_subscribe_email_body = context.get("footer_subscribe_email_body", "")
     if not footer_subscribe_email_body:
-        instance = FooterInfo.objects.first()
-        footer_subscribe_email_body = (
-            instance.subscribe_email_body
-            if instance
-            else "Stay updated on the exlusive list of events that unfold"
-        )
+        footer_subscribe_email_body = get_footer(context.get("request"))[
+            "subscribe_email_body"
+        ]
     return {"footer_subscribe_email_body": footer_subscribe_email_body}
 
 
 @register.inclusion_tag("base/include/footer_links.html", takes_context=True)
 def get_footer_links(context):
-    homepage = HomePage.objects.first()
-    children = homepage.get_children().live()
-    return {"links": children}
+    return {"links": get_footer(context.get("request"))["links"]}
 
 
 @register.inclusion_tag("base/include/footer_services.html", takes_context=True)
 def get_footer_services(context):
-    services = Service.objects.all()
-    return {"services": services}
+    return {"services": get_footer(context.get("request"))["services"]}
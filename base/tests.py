@@ -1,3 +1,454 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache, caches
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from wagtail.blocks import ListBlock, StreamBlock, StructBlock
+from wagtail.images import get_image_model
+from wagtail.images.blocks import ImageChooserBlock
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.images.views.serve import generate_image_url
+from wagtail.models import Site
+
+from home.models import HomePage
+from services.models import Service
+
+from .cache import TieredCache
+from .checks import check_shared_cache
+from .footer import get_footer
+from .management.commands.warm_renditions import block_image_ids, discover
+from .image_serve import get_cache_dir, prune_cache_dir
+from .mail import queue_email, send_queued_emails
+from .navigation import affects_menu, build_menu_tree, get_menu_tree
+from .sites import get_resolution_version, resolve_site
+from .models import (
+    FormField,
+    FormPage,
+    GenericSettings,
+    OutboundEmail,
+    SiteSettings,
+    StandardPage,
+)
+
+
+@override_settings(EMAIL_QUEUE_RETRY_DELAY=60, EMAIL_QUEUE_MAX_ATTEMPTS=3)
+class EmailQueueTests(TestCase):
+    @override_settings(EMAIL_HOST_USER="shop@example.com")
+    def test_contact_form_queues_instead_of_sending(self):
+        response = self.client.post(
+            "/base/contact/",
+            {"email": "visitor@example.com", "subject": "Hello", "message": "Hi"},
+        )
+        self.assertRedirects(response, "/base/success/")
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(send_queued_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["shop@example.com"])
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.SENT)
+
+    def test_form_page_queues_its_notification(self):
+        page = FormPage(
+            title="Enquiry",
+            slug="enquiry",
+            to_address="a@example.com, b@example.com",
+            from_address="site@example.com",
+            subject="New enquiry",
+        )
+        HomePage.objects.get().add_child(instance=page)
+        FormField.objects.create(page=page, label="Name", field_type="singleline")
+
+        self.client.post(page.url, {"name": "Ann"})
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.to, ["a@example.com", "b@example.com"])
+        self.assertIn("Name: Ann", email.body)
+
+        send_queued_emails()
+        self.assertEqual(mail.outbox[0].from_email, "site@example.com")
+
+    def test_failures_back_off_then_stop(self):
+        email = queue_email("Subject", "Body", ["to@example.com"])
+        with mock.patch(
+            "django.core.mail.EmailMessage.send", side_effect=OSError("refused")
+        ):
+            self.assertEqual(send_queued_emails(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, 1)
+            self.assertEqual(email.status, OutboundEmail.PENDING)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            # Not due yet.
+            self.assertEqual(send_queued_emails(), (0, 0))
+
+            for attempt in (2, 3):
+                OutboundEmail.objects.update(next_attempt_at=timezone.now())
+                send_queued_emails()
+                email.refresh_from_db()
+                self.assertEqual(email.attempts, attempt)
+
+        self.assertEqual(email.status, OutboundEmail.FAILED)
+        self.assertEqual(email.last_error, "OSError: refused")
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+    def test_batches_are_limited(self):
+        for i in range(3):
+            queue_email(f"Subject {i}", "Body", ["to@example.com"])
+        self.assertEqual(send_queued_emails(batch_size=2), (2, 0))
+        self.assertEqual(send_queued_emails(batch_size=2), (1, 0))
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class FooterTests(TestCase):
+    def setUp(self):
+        home = HomePage.objects.get()
+        self.section = home.add_child(instance=StandardPage(title="Shop", slug="shop"))
+        self.services = self.section.add_child(
+            instance=StandardPage(title="Services", slug="services")
+        )
+        self.screen = self.services.add_child(
+            instance=StandardPage(title="Screen", slug="screen")
+        )
+        Service.objects.create(title="Screens", link=self.screen)
+
+    def get_service_url(self):
+        return get_footer()["services"][0]["url"]
+
+    def rename(self, page, slug):
+        page.slug = slug
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save_revision().publish()
+
+    def test_service_link_follows_slug_change(self):
+        self.assertEqual(self.get_service_url(), "/shop/services/screen/")
+        self.rename(self.screen, "screen-repair")
+        self.assertEqual(self.get_service_url(), "/shop/services/screen-repair/")
+
+    def test_service_link_follows_ancestor_slug_change(self):
+        self.assertEqual(self.get_service_url(), "/shop/services/screen/")
+        self.rename(self.services, "repairs")
+        self.assertEqual(self.get_service_url(), "/shop/repairs/screen/")
+
+
+class MenuTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.home = HomePage.objects.get()
+        self.shop = self.add_page(self.home, "shop")
+        self.repairs = self.add_page(self.shop, "repairs")
+        self.hidden = self.add_page(self.home, "hidden", show_in_menus=False)
+
+    def add_page(self, parent, slug, show_in_menus=True):
+        return parent.add_child(
+            instance=StandardPage(title=slug, slug=slug, show_in_menus=show_in_menus)
+        )
+
+    def get_menu(self):
+        tree = get_menu_tree(Site.objects.get())
+        return {
+            item.slug: [child.slug for child in item.children] for item in tree.values()
+        }
+
+    def publish(self, page):
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save_revision().publish()
+
+    def test_tree_is_built_in_one_query(self):
+        site = Site.objects.select_related("root_page").get()
+        # Resolve the site's URLs once; sites are cached apart.
+        build_menu_tree(site)
+        with self.assertNumQueries(1):
+            tree = build_menu_tree(site)
+        self.assertEqual(
+            [item.slug for item in tree.values()], ["home", "shop", "repairs"]
+        )
+        self.assertEqual(tree["/home/shop/"].children, [tree["/home/shop/repairs/"]])
+
+    def test_affects_menu(self):
+        self.get_menu()
+        self.assertTrue(affects_menu(self.repairs))
+        self.assertFalse(affects_menu(self.hidden))
+        # Not listed yet, but would be under a menu item.
+        self.hidden.show_in_menus = True
+        self.assertTrue(affects_menu(self.hidden))
+        below_hidden = self.add_page(self.hidden, "below", show_in_menus=True)
+        self.assertFalse(affects_menu(below_hidden))
+
+    def test_show_in_menus_toggle(self):
+        self.assertEqual(self.get_menu()["home"], ["shop"])
+        self.hidden.show_in_menus = True
+        self.publish(self.hidden)
+        self.assertEqual(self.get_menu()["home"], ["shop", "hidden"])
+        self.shop.show_in_menus = False
+        self.publish(self.shop)
+        self.assertEqual(self.get_menu(), {"home": ["hidden"], "hidden": []})
+
+    def test_unpublish(self):
+        self.get_menu()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.repairs.unpublish()
+        self.assertEqual(self.get_menu()["shop"], [])
+
+    def test_move(self):
+        self.get_menu()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.repairs.move(self.home, pos="last-child")
+        self.assertEqual(self.get_menu()["home"], ["shop", "repairs"])
+
+
+class SiteResolutionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.site = Site.objects.get()
+        self.site_settings = SiteSettings.for_site(self.site)
+        self.generic_settings = GenericSettings.load()
+
+    def resolve(self):
+        request = RequestFactory().get("/", SERVER_NAME=self.site.hostname)
+        resolve_site(request)
+        return request
+
+    def test_root_page_is_not_shared_between_requests(self):
+        first = self.resolve()._wagtail_site
+        self.assertEqual(first.root_page.numchild, 0)
+        first.root_page.add_child(instance=StandardPage(title="New", slug="new"))
+        second = self.resolve()._wagtail_site
+        self.assertIsNot(second.root_page, first.root_page)
+        # Routing to the new child needs the current numchild.
+        self.assertEqual(second.root_page.numchild, 1)
+
+    def test_resolution_is_reused_until_a_change(self):
+        self.resolve()
+        with self.assertNumQueries(0):
+            site = self.resolve()._wagtail_site
+        self.assertEqual(site.pk, self.site.pk)
+
+    def assertBumpedBy(self, change):
+        self.resolve()
+        version = get_resolution_version()
+        change()
+        self.assertNotEqual(get_resolution_version(), version)
+        return self.resolve()
+
+    def test_site_save_bumps_the_token(self):
+        self.site.site_name = "Phone Centre"
+        request = self.assertBumpedBy(self.site.save)
+        self.assertEqual(request._wagtail_site.site_name, "Phone Centre")
+
+    def test_settings_save_bumps_the_token(self):
+        self.site_settings.logo = "PC"
+        request = self.assertBumpedBy(self.site_settings.save)
+        self.assertEqual(SiteSettings.for_request(request).logo, "PC")
+
+        self.generic_settings.phone = "0123"
+        request = self.assertBumpedBy(self.generic_settings.save)
+        self.assertEqual(GenericSettings.load(request_or_site=request).phone, "0123")
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT, IMAGE_SERVE_CACHE_DIR=os.path.join(MEDIA_ROOT, "image-cache")
+)
+class ImageServeCacheTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(get_cache_dir(), ignore_errors=True)
+        self.image = get_image_model().objects.create(
+            title="Photo", file=get_test_image_file()
+        )
+
+    def get_cached_files(self):
+        return [
+            os.path.join(dirpath, filename)
+            for dirpath, _, filenames in os.walk(get_cache_dir())
+            for filename in filenames
+        ]
+
+    def test_invalidation_deletes_files(self):
+        response = self.client.get(generate_image_url(self.image, "width-10"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.get_cached_files()), 1)
+        self.image.save()
+        self.assertEqual(self.get_cached_files(), [])
+
+    def test_serving_records_use(self):
+        url = generate_image_url(self.image, "width-10")
+        self.client.get(url)
+        (path,) = self.get_cached_files()
+        os.utime(path, (0, 0))
+        self.client.get(url)
+        self.assertGreater(os.stat(path).st_atime, time.time() - 60)
+        self.assertEqual(os.stat(path).st_mtime, 0)
+
+    def test_prune_keeps_recently_used_files(self):
+        self.client.get(generate_image_url(self.image, "width-10"))
+        (path,) = self.get_cached_files()
+        # Used yesterday, written long ago.
+        os.utime(path, (time.time() - 60 * 60 * 24, 0))
+        self.assertEqual(prune_cache_dir(60 * 60 * 24 * 2), 0)
+        # Files just used are kept whatever the age asked for.
+        os.utime(path, (time.time(), 0))
+        self.assertEqual(prune_cache_dir(0), 0)
+        self.assertEqual(self.get_cached_files(), [path])
+
+    def test_prune_deletes_old_files(self):
+        self.client.get(generate_image_url(self.image, "width-10"))
+        self.client.get(generate_image_url(self.image, "width-20"))
+        old, new = self.get_cached_files()
+        os.utime(old, (0, 0))
+        self.assertEqual(prune_cache_dir(60), 1)
+        self.assertEqual(self.get_cached_files(), [new])
+        # A pruned file is copied again when it is next requested.
+        for spec in ("width-10", "width-20"):
+            response = self.client.get(generate_image_url(self.image, spec))
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.get_cached_files()), 2)
+
+
+TIERED_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "tiered": {
+        "BACKEND": "base.cache.TieredCache",
+        "LOCATION": "tiered",
+        "OPTIONS": {"SHARED": "tiered-shared", "LOCAL_TIMEOUT": 5},
+    },
+    "tiered-shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tiered-shared",
+    },
+}
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        # Two workers: separate local tiers in front of one shared cache.
+        self.shared = caches["tiered-shared"]
+        self.worker = self.get_worker("worker-a")
+        self.other = self.get_worker("worker-b")
+        for tier in (self.shared, self.worker.local, self.other.local):
+            tier.clear()
+
+    def get_worker(self, name):
+        return TieredCache(
+            name, {"OPTIONS": {"SHARED": "tiered-shared", "LOCAL_TIMEOUT": 5}}
+        )
+
+    def later(self, seconds):
+        return mock.patch("time.time", return_value=time.time() + seconds)
+
+    def test_reads_keep_a_local_copy_until_it_expires(self):
+        self.shared.set("key", "old", 300)
+        self.assertEqual(self.worker.get("key"), "old")
+        self.shared.set("key", "new", 300)
+        self.assertEqual(self.worker.get("key"), "old")
+        with self.later(6):
+            self.assertEqual(self.worker.get("key"), "new")
+
+    def test_local_copy_does_not_outlive_the_shared_timeout(self):
+        self.worker.set("key", "value", 2)
+        with self.later(3):
+            self.assertIsNone(self.worker.get("key"))
+
+    def test_writes_and_deletes_reach_both_tiers(self):
+        self.worker.set_many({"a": 1, "b": 2})
+        self.assertEqual(self.shared.get_many(["a", "b"]), {"a": 1, "b": 2})
+        self.assertEqual(self.worker.local.get_many(["a", "b"]), {"a": 1, "b": 2})
+        self.worker.delete("a")
+        self.worker.delete_many(["b"])
+        for tier in (self.shared, self.worker.local):
+            self.assertEqual(tier.get_many(["a", "b"]), {})
+
+    def test_get_many_fills_local_misses_from_shared(self):
+        self.worker.set("a", 1)
+        self.shared.set("b", 2)
+        self.assertEqual(self.worker.get_many(["a", "b", "c"]), {"a": 1, "b": 2})
+        self.assertEqual(self.worker.local.get("b"), 2)
+        stats = self.worker.get_stats()
+        self.assertEqual(
+            (stats["local_hits"], stats["shared_hits"], stats["misses"]), (1, 1, 1)
+        )
+
+    def test_version_token_reads(self):
+        # The version-token pattern: the first reader adds a token, and an
+        # invalidation deletes it so the next reader adds a new one.
+        self.worker.add("token", uuid.uuid4().hex)
+        token = self.worker.get("token")
+        self.assertEqual(self.other.get("token"), token)
+        self.other.delete("token")
+        self.assertTrue(self.other.add("token", uuid.uuid4().hex))
+        new_token = self.other.get("token")
+        self.assertNotEqual(new_token, token)
+        # The other worker's invalidation reaches this one within LOCAL_TIMEOUT.
+        self.assertEqual(self.worker.get("token"), token)
+        with self.later(6):
+            self.assertEqual(self.worker.get("token"), new_token)
+
+    @override_settings(DEBUG=False, DEVELOPMENT_MODE=0)
+    def test_check_warns_about_a_process_local_shared_tier(self):
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)], ["base.W001"]
+        )
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_shared_cache(None), [])
+        file_cache = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": tempfile.gettempdir(),
+        }
+        with override_settings(CACHES={**TIERED_CACHES, "tiered-shared": file_cache}):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class WarmRenditionsTests(SimpleTestCase):
+    def test_finds_images_in_nested_blocks(self):
+        block = StreamBlock(
+            [
+                ("image", ImageChooserBlock()),
+                (
+                    "gallery",
+                    ListBlock(
+                        StructBlock(
+                            [
+                                ("photo", ImageChooserBlock()),
+                                ("more", ListBlock(ImageChooserBlock())),
+                            ]
+                        )
+                    ),
+                ),
+            ]
+        )
+        value = [
+            {"type": "image", "value": 1},
+            {
+                "type": "gallery",
+                "value": [
+                    {"type": "item", "value": {"photo": 2, "more": [3]}},
+                    # Stored before ListBlock items had ids.
+                    {"photo": 4, "more": []},
+                    {"type": "item", "value": {"photo": None, "more": None}},
+                ],
+            },
+            {"type": "removed", "value": 5},
+        ]
+        self.assertEqual(list(block_image_ids(block, value)), [1, 2, 3, 4])
+
+    def test_discovers_stream_field_images(self):
+        body = [{"type": "image_block", "value": {"image": 7, "caption": ""}}]
+        page = StandardPage(title="About", slug="about", body=json.dumps(body))
+        self.assertEqual(list(discover(page)), [(7, "block")])
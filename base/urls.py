@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import Success, contact
+from .views import Success, contact, metrics
 
 
 urlpatterns = [
     path('contact/',contact,name='contact'),
-    path('success/',Success.as_view(),name='success')
+    path('success/',Success.as_view(),name='success'),
+    path('metrics/',metrics,name='metrics'),
 ]
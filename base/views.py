@@ -1,10 +1,14 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render, redirect
 from .forms import ContactForm
-from django.core.mail import send_mail
 from django.conf import settings
 
 from django.views import generic
 
+from .mail import queue_email
+from .metrics import get_metrics
+
 def contact(request):
     if request.method == "POST":
         form = ContactForm(request.POST)
@@ -18,11 +22,16 @@ def contact(request):
 
             message = f"Sender: {emailFrom}\nName: {name}\nSubject: {subject}\nComment: {comment}"
 
-            send_mail(subject, message, emailFrom, emailTo, fail_silently=True)
+            queue_email(subject, message, emailTo, from_email=emailFrom)
             return redirect("success")
 
     form = ContactForm()
     return render(request, "home/home_page.html")
 
 class Success(generic.TemplateView):
-    template_name = 'base/success.html'
\ No newline at end of file
+    template_name = 'base/success.html'
+
+
+@staff_member_required
+def metrics(request):
+    return JsonResponse(get_metrics())
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bloglisting",
+            name="cursor_pagination",
+            field=models.BooleanField(
+                default=True,
+                help_text="Page through posts with previous/next links that stay fast however deep the reader goes. Uncheck to show a link for every page number instead.",
+                verbose_name="Cursor pagination",
+            ),
+        ),
+        migrations.AddField(
+            model_name="bloglisting",
+            name="posts_per_page",
+            field=models.PositiveSmallIntegerField(
+                default=10,
+                help_text="The number of posts shown on each page of the listing, tag and category views.",
+                verbose_name="Posts per page",
+            ),
+        ),
+    ]
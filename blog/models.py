@@ -1,11 +1,16 @@
+import uuid
+
 from django.db import models
 from django.contrib import messages
+from django.core.cache import cache
 from django import forms
 from django.shortcuts import render, redirect
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.utils.functional import cached_property
 
 from wagtail.models import Page, Orderable, ClusterableModel
 from wagtail.fields import StreamField
+from wagtail.images import get_image_model
 from wagtail.snippets.models import register_snippet
 from wagtail.admin.panels import (
     MultiFieldPanel,
@@ -23,6 +28,65 @@ from modelcluster.contrib.taggit import ClusterTaggableManager
 from autoslug import AutoSlugField
 
 from base.blocks import BaseStreamBlock
+from base.images import get_filter_specs
+from base.page_cache import CachedPageMixin, model_tag, object_tag, record, tag_for
+
+from .pagination import CursorPaginator
+
+
+TAG_INDEX_VERSION_KEY = "blog:tag-index:version:{}"
+TAG_INDEX_CACHE_KEY = "blog:tag-index:{}:{}"
+TAG_INDEX_CACHE_TIMEOUT = 60 * 60 * 24
+
+LATEST_POSTS_VERSION_KEY = "blog:latest-posts:version:{}"
+LATEST_POSTS_CACHE_KEY = "blog:latest-posts:{}:{}"
+LATEST_POSTS_CACHE_TIMEOUT = 60 * 60 * 24
+LATEST_POSTS_COUNT = 5
+LATEST_POSTS_IMAGE_FILTER = get_filter_specs("thumbnail")[0]
+
+
+def get_cache_version(key):
+    """
+    The version token stored at ``key``, added if there is none. Deleting
+    it invalidates everything cached under it, in every worker.
+    """
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def is_prefetched(instance, relation):
+    # Chaining onto a prefetched relation would query it again.
+    return relation in getattr(instance, "_prefetched_objects_cache", {})
+
+
+def tag_url(listing_url, tag):
+    return f"{listing_url}tags/{tag.slug}/"
+
+
+def category_url(listing_url, category):
+    return f"{listing_url}categories/{category.name}"
+
+
+def get_latest_post_entry(post):
+    thumbnail = None
+    if post.image:
+        rendition = post.image.get_rendition(LATEST_POSTS_IMAGE_FILTER)
+        thumbnail = {
+            "url": rendition.url,
+            "width": rendition.width,
+            "height": rendition.height,
+        }
+    return {
+        "id": post.id,
+        "title": post.title,
+        "slug": post.slug,
+        "date_published": post.date_published,
+        "thumbnail": thumbnail,
+    }
 
 
 class BlogCategoryRelationship(Orderable, models.Model):
@@ -59,7 +123,7 @@ class BlogPageTag(TaggedItemBase):
 
 
 # *********************** BLOG PAGE **********************************
-class BlogPage(Page):
+class BlogPage(CachedPageMixin, Page):
     introduction = models.TextField(
         help_text="A brief overview or introduction to the post.", blank=True
     )
@@ -99,11 +163,17 @@ class BlogPage(Page):
     #     help_text="Select categories that best describe the content of the post.",
     # )
 
+    # Boosts become Postgres tsvector weights: the title (boost 2 in
+    # Page.search_fields), tags and categories rank above the subtitle and
+    # introduction, and those above the body text.
     search_fields = Page.search_fields + [
-        index.SearchField("title"),
-        index.SearchField("introduction"),
-        index.SearchField("subtitle"),
-        index.SearchField("tags"),
+        index.SearchField("subtitle", boost=1.5),
+        index.SearchField("introduction", boost=1.5),
+        index.RelatedFields("tags", [index.SearchField("name", boost=2)]),
+        index.RelatedFields(
+            "blog_category_relationship",
+            [index.RelatedFields("category", [index.SearchField("name", boost=2)])],
+        ),
         index.SearchField("body"),
         index.FilterField("date_published"),
     ]
@@ -142,25 +212,38 @@ class BlogPage(Page):
         various elements such as the title, introduction, subtitle, featured image, main \
             content, tags, publication date, and categories."
 
+    listing_url = None
+
     class Meta:
         verbose_name = "Blogpage"
         verbose_name_plural = "Blogpages"
 
-    def authors(self):
-        return [
-            n.author
-            for n in self.blog_author_relationship.all().select_related("author")
-        ]
+    def get_cache_tags(self):
+        tags = super().get_cache_tags()
+        # The sidebar lists the other posts, so any post change applies.
+        tags.append(model_tag(BlogPage))
+        if self.image_id:
+            tags.append(object_tag(get_image_model(), self.image_id))
+        return tags
 
-    @property
+    def authors(self):
+        relationships = self.blog_author_relationship.all()
+        if not is_prefetched(self, "blog_author_relationship"):
+            relationships = relationships.select_related("author")
+        authors = [n.author for n in relationships]
+        record(*[tag_for(author) for author in authors])
+        return authors
+
+    @cached_property
     def categories(self):
-        cats = [
-            n.category
-            for n in self.blog_category_relationship.all().select_related("category")
-        ]
-        base_url = self.get_parent().url
+        relationships = self.blog_category_relationship.all()
+        if not is_prefetched(self, "blog_category_relationship"):
+            relationships = relationships.select_related("category")
+        cats = [n.category for n in relationships]
+        record(*[tag_for(cat) for cat in cats])
+        base_url = self.get_listing_url()
         for cat in cats:
-            cat.url = f"{base_url}categories/{cat.name}"
+            cat.url = category_url(base_url, cat)
         return cats
 
     def get_author(self):
@@ -170,14 +253,30 @@ class BlogPage(Page):
             author = ""
         return author
 
-    @property
+    @cached_property
     def get_tags(self):
-        tags = self.tags.all()
-        base_url = self.get_parent().url
+        record(model_tag(Tag))
+        tags = list(self.tags.all())
+        base_url = self.get_listing_url()
         for tag in tags:
-            tag.url = f"{base_url}tags/{tag.slug}/"
+            tag.url = tag_url(base_url, tag)
         return tags
 
+    def get_listing_url(self, request=None):
+        """
+        The URL of the listing this post sits under. Posts are always direct
+        children of a BlogListing, so it is the post's own URL less its
+        slug, which needs no tree query. Set ``listing_url`` to skip even
+        that, as BlogListing.prefetch_post_cards() does for a page of posts.
+        """
+        if self.listing_url is None:
+            url = self.get_url(request)
+            if url and url.endswith(f"/{self.slug}/"):
+                self.listing_url = url[: -len(self.slug) - 1]
+            else:
+                self.listing_url = self.get_parent().get_url(request) or ""
+        return self.listing_url
+
     # def get_all_categories(self):
     #     categories = Category.objects.all()
     #     base_url = self.get_parent().url
@@ -187,10 +286,12 @@ class BlogPage(Page):
 
     def get_context(self, request):
         context = super(BlogPage, self).get_context(request)
+        listing = self.get_parent().specific
+        self.listing_url = listing.get_url(request)
         context["author"] = self.get_author()
-        context["latest_posts"] = (
-            BlogPage.objects.live().exclude(id=self.id).order_by("-date_published")
-        )
+        context["listing"] = listing
+        context["tags"] = listing.get_child_tags()
+        context["latest_posts"] = listing.get_latest_posts(exclude=self.id)
         return context
 
     parent_page_types = ["BlogListing"]
@@ -204,11 +305,28 @@ class BlogListing(RoutablePageMixin, Page):
         blank=True,
         help_text="This text serves as a brief introduction or overview for the blog listing page. It may provide context or a summary of the content featured on this page.",
     )
+    posts_per_page = models.PositiveSmallIntegerField(
+        verbose_name="Posts per page",
+        default=10,
+        help_text="The number of posts shown on each page of the listing, tag and category views.",
+    )
+    cursor_pagination = models.BooleanField(
+        verbose_name="Cursor pagination",
+        default=True,
+        help_text="Page through posts with previous/next links that stay fast however deep the reader goes. Uncheck to show a link for every page number instead.",
+    )
 
     content_panels = Page.content_panels + [
         FieldPanel("introduction"),
     ]
 
+    settings_panels = Page.settings_panels + [
+        MultiFieldPanel(
+            [FieldPanel("posts_per_page"), FieldPanel("cursor_pagination")],
+            heading="Pagination",
+        ),
+    ]
+
     subpage_types = ["BlogPage"]
     page_description = "This page lists all published blog entries, providing editors with an overview of the latest content."
 
@@ -217,9 +335,8 @@ class BlogListing(RoutablePageMixin, Page):
 
     def get_context(self, request):
         context = super(BlogListing, self).get_context(request)
-        posts = BlogPage.objects.descendant_of(self).live().order_by("-date_published")
-        context["posts"] = self.paginate(request, posts)
-        context["latest_posts"] = self.get_posts()[:5]
+        context["posts"] = self.paginate(request, self.get_posts())
+        context["latest_posts"] = self.get_latest_posts()
         context["tags"] = self.get_child_tags()
         return context
 
@@ -237,7 +354,7 @@ class BlogListing(RoutablePageMixin, Page):
                 msg = 'There are no posts tagged with "{}"'.format(tag)
                 messages.add_message(request, messages.INFO, msg)
             return redirect(self.url)
-        posts = self.get_posts(tag=tag)
+        posts = self.paginate(request, self.get_posts(tag=tag))
         tags = self.get_child_tags()
         latest_posts = self.get_latest_posts()
         context = {
@@ -261,7 +378,9 @@ class BlogListing(RoutablePageMixin, Page):
                 )
                 messages.add_message(request, messages.INFO, msg)
             return redirect(self.url)
-        posts = self.get_posts_by_category(category=category)
+        posts = self.paginate(
+            request, self.get_posts_by_category(category=category)
+        )
         tags = self.get_child_tags()
         latest_posts = self.get_latest_posts()
 
@@ -274,20 +393,62 @@ class BlogListing(RoutablePageMixin, Page):
         }
         return render(request, "blog/blog_listing.html", context)
 
-    def get_latest_posts(self):
-        latest_posts = (
-            BlogPage.objects.live().exclude(id=self.id).order_by("-date_published")
+    def build_latest_posts(self):
+        """
+        List the most recent live posts of this listing, newest first, with
+        what the sidebar shows of each. One more than LATEST_POSTS_COUNT is
+        kept so a post page can leave itself out and still show a full list.
+        """
+        posts = self.get_posts().prefetch_related(
+            models.Prefetch(
+                "image",
+                queryset=get_image_model().objects.prefetch_renditions(
+                    LATEST_POSTS_IMAGE_FILTER
+                ),
+            )
         )
-        return latest_posts
+        return [
+            get_latest_post_entry(post) for post in posts[: LATEST_POSTS_COUNT + 1]
+        ]
+
+    def get_latest_posts(self, exclude=None):
+        version = get_cache_version(LATEST_POSTS_VERSION_KEY.format(self.id))
+        key = LATEST_POSTS_CACHE_KEY.format(self.id, version)
+        entries = cache.get(key)
+        if entries is None:
+            entries = self.build_latest_posts()
+            cache.set(key, entries, LATEST_POSTS_CACHE_TIMEOUT)
+        base_url = self.url
+        latest_posts = [
+            dict(entry, url=f"{base_url}{entry['slug']}/")
+            for entry in entries
+            if entry["id"] != exclude
+        ]
+        return latest_posts[:LATEST_POSTS_COUNT]
+
+    @classmethod
+    def invalidate_latest_posts(cls, *listing_ids):
+        """
+        Like invalidate_tag_indexes(), for the latest posts of ``listing_ids``
+        or of every listing.
+        """
+        if not listing_ids:
+            listing_ids = cls.objects.values_list("id", flat=True)
+        cache.delete_many([LATEST_POSTS_VERSION_KEY.format(pk) for pk in listing_ids])
 
     def serve_preview(self, request, mode_name):
         return self.serve(request)
 
-    def get_posts(self, tag=None):
-        posts = BlogPage.objects.live().descendant_of(self).order_by("-date_published")
+    def get_posts(self, tag=None, category=None):
+        posts = BlogPage.objects.live().descendant_of(self)
         if tag:
             posts = posts.filter(tags=tag)
-        return posts
+        if category:
+            posts = posts.filter(
+                blog_category_relationship__category=category
+            ).distinct()
+        # Undated posts last on every database, as CursorPaginator pages them.
+        return posts.order_by(models.F("date_published").desc(nulls_last=True), "-id")
 
     # def get_posts_by_category(self, category=None):
     #     posts = BlogPage.objects.live().descendant_of(self).order_by("-date_published")
@@ -296,32 +457,107 @@ class BlogListing(RoutablePageMixin, Page):
     #     return posts
 
     def get_posts_by_category(self, category=None):
-        posts = BlogPage.objects.live().descendant_of(self).order_by("-date_published")
-        if category:
-            posts = [
-                n.page.specific
-                for n in BlogCategoryRelationship.objects.filter(
-                    category__in=[category]
-                )
-            ]
-        return posts
+        return self.get_posts(category=category)
+
+    def build_tag_index(self):
+        """
+        Map every tag used by the live posts of this listing to its name,
+        slug and post count, in one grouped query.
+        """
+        rows = (
+            BlogPageTag.objects.filter(
+                content_object__in=BlogPage.objects.live().descendant_of(self)
+            )
+            .values("tag_id", "tag__name", "tag__slug")
+            .annotate(count=models.Count("id"))
+            .order_by()
+        )
+        return {
+            row["tag_id"]: {
+                "name": row["tag__name"],
+                "slug": row["tag__slug"],
+                "count": row["count"],
+            }
+            for row in rows
+        }
+
+    def get_tag_index(self):
+        version = get_cache_version(TAG_INDEX_VERSION_KEY.format(self.id))
+        key = TAG_INDEX_CACHE_KEY.format(self.id, version)
+        tag_index = cache.get(key)
+        if tag_index is None:
+            tag_index = self.build_tag_index()
+            cache.set(key, tag_index, TAG_INDEX_CACHE_TIMEOUT)
+        return tag_index
+
+    @classmethod
+    def invalidate_tag_indexes(cls, *listing_ids):
+        """
+        Replace the version tokens of the tag indexes of ``listing_ids``, or
+        of every listing, so the next read rebuilds them. Called once the
+        change has committed: an index built from an older snapshot in the
+        meantime is stored under the old token and never read again.
+        """
+        if not listing_ids:
+            listing_ids = cls.objects.values_list("id", flat=True)
+        cache.delete_many([TAG_INDEX_VERSION_KEY.format(pk) for pk in listing_ids])
 
     def get_child_tags(self):
+        base_url = self.url
         tags = []
-        for post in self.get_posts():
-            tags += post.get_tags
-        tags = sorted(set(tags))
-        return tags
+        for tag_id, entry in self.get_tag_index().items():
+            tag = Tag(id=tag_id, name=entry["name"], slug=entry["slug"])
+            tag.url = tag_url(base_url, tag)
+            tag.post_count = entry["count"]
+            tags.append(tag)
+        return sorted(tags)
+
+    def prefetch_post_cards(self, posts, request=None):
+        """
+        Load everything a post card renders for a whole page of posts in a
+        fixed number of queries, however many posts there are: authors,
+        categories, tags, and the featured image with its card rendition.
+        """
+        posts = list(posts)
+        listing_url = self.get_url(request)
+        for post in posts:
+            post.listing_url = listing_url
+        models.prefetch_related_objects(
+            posts,
+            models.Prefetch(
+                "blog_author_relationship",
+                queryset=BlogAuthorRelationship.objects.select_related("author"),
+            ),
+            models.Prefetch(
+                "blog_category_relationship",
+                queryset=BlogCategoryRelationship.objects.select_related("category"),
+            ),
+            "tags",
+            models.Prefetch(
+                "image",
+                queryset=get_image_model().objects.prefetch_renditions(
+                    *get_filter_specs("post")
+                ),
+            ),
+        )
+        return posts
 
-    def paginate(self, request, *args):
-        page = request.GET.get("page")
-        paginator = Paginator(self.get_posts(), 2)
-        try:
-            pages = paginator.page(page)
-        except PageNotAnInteger:
-            pages = paginator.page(1)
-        except EmptyPage:
-            pages = paginator.page(paginator.num_pages)
+    def paginate(self, request, posts):
+        if self.cursor_pagination:
+            paginator = CursorPaginator(
+                posts, self.posts_per_page, count_key=f"{self.id}:{request.path}"
+            )
+            pages = paginator.page(request.GET.get("cursor"))
+        else:
+            page = request.GET.get("page")
+            paginator = Paginator(posts, self.posts_per_page)
+            try:
+                pages = paginator.page(page)
+            except PageNotAnInteger:
+                pages = paginator.page(1)
+            except EmptyPage:
+                pages = paginator.page(paginator.num_pages)
+        pages.object_list = self.prefetch_post_cards(pages.object_list, request)
         return pages
 
 
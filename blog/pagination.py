@@ -0,0 +1,137 @@
+import datetime
+import math
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import F, Q
+
+
+CURSOR_SALT = "blog.pagination.cursor"
+COUNT_CACHE_KEY = "blog:post-count:{}"
+COUNT_CACHE_TIMEOUT = 60 * 10
+
+
+class CursorPage:
+    """
+    One page of a CursorPaginator. Quacks enough like Django's Page for the
+    listing templates, plus opaque tokens for the neighbouring pages.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, number, num_pages, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.number = number
+        self.num_pages = num_pages
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    """
+    Keyset pagination over posts ordered newest first by
+    ``(date_published, id)``. Each page is fetched with a WHERE on the key
+    of the previous page's edge instead of an OFFSET, so deep pages cost
+    the same as page one and no COUNT(*) is needed.
+
+    Pass ``count_key`` to also get an approximate, cached page count for
+    the page-number UI. A cursor that is invalid, or has nothing beyond it
+    any more, gives the first page.
+    """
+
+    def __init__(self, queryset, per_page, count_key=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.count_key = count_key
+
+    def encode_cursor(self, post, direction, number):
+        date = post.date_published.isoformat() if post.date_published else None
+        return signing.dumps(
+            {"d": date, "i": post.id, "r": direction, "n": number},
+            salt=CURSOR_SALT,
+            compress=True,
+        )
+
+    def decode_cursor(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            date = datetime.date.fromisoformat(data["d"]) if data["d"] else None
+            return date, int(data["i"]), data["r"], int(data["n"])
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            return None
+
+    def get_num_pages(self):
+        if self.count_key is None:
+            return None
+        key = COUNT_CACHE_KEY.format(self.count_key)
+        count = cache.get(key)
+        if count is None:
+            count = self.queryset.count()
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return max(1, math.ceil(count / self.per_page))
+
+    def page(self, cursor=None):
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            date, post_id, direction, number = None, None, "after", 1
+        else:
+            date, post_id, direction, number = decoded
+
+        newest_first = [F("date_published").desc(nulls_last=True), F("id").desc()]
+        oldest_first = [F("date_published").asc(nulls_first=True), F("id").asc()]
+
+        if post_id is None:
+            posts = self.queryset.order_by(*newest_first)
+        elif direction == "before":
+            if date is None:
+                after_key = Q(date_published__isnull=False) | Q(id__gt=post_id)
+            else:
+                after_key = Q(date_published__gt=date) | Q(
+                    date_published=date, id__gt=post_id
+                )
+            posts = self.queryset.filter(after_key).order_by(*oldest_first)
+        else:
+            if date is None:
+                before_key = Q(date_published__isnull=True, id__lt=post_id)
+            else:
+                before_key = (
+                    Q(date_published__lt=date)
+                    | Q(date_published=date, id__lt=post_id)
+                    | Q(date_published__isnull=True)
+                )
+            posts = self.queryset.filter(before_key).order_by(*newest_first)
+
+        # One extra row tells whether there is more in that direction.
+        posts = list(posts[: self.per_page + 1])
+        if not posts and post_id is not None:
+            # Nothing left beyond the cursor's post since it was made.
+            return self.page()
+        has_more = len(posts) > self.per_page
+        posts = posts[: self.per_page]
+
+        if direction == "before":
+            posts.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, post_id is not None
+
+        next_cursor = previous_cursor = None
+        if posts and has_next:
+            next_cursor = self.encode_cursor(posts[-1], "after", number + 1)
+        if posts and has_previous:
+            previous_cursor = self.encode_cursor(posts[0], "before", number - 1)
+        return CursorPage(
+            posts, number, self.get_num_pages(), next_cursor, previous_cursor
+        )
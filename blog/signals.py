@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from wagtail.images import get_image_model
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from taggit.models import Tag
+
+from .models import BlogListing, BlogPage
+
+
+def get_listing(post):
+    # Looked up by path rather than get_parent(): when a whole listing is
+    # deleted, its posts' post_delete runs after the listing row is gone.
+    return BlogListing.objects.filter(path=post.path[: -post.steplen]).first()
+
+
+def on_commit(invalidate, *listing_ids):
+    # After commit, so a rebuild can't cache the posts from before it.
+    transaction.on_commit(lambda: invalidate(*listing_ids))
+
+
+def invalidate_listings(*listing_ids):
+    on_commit(BlogListing.invalidate_tag_indexes, *listing_ids)
+    on_commit(BlogListing.invalidate_latest_posts, *listing_ids)
+
+
+@receiver(page_published, sender=BlogPage)
+@receiver(page_unpublished, sender=BlogPage)
+@receiver(post_delete, sender=BlogPage)
+def post_changed(sender, instance, **kwargs):
+    listing = get_listing(instance)
+    if listing is not None:
+        invalidate_listings(listing.id)
+
+
+@receiver(post_page_move, sender=BlogPage)
+def post_moved(sender, instance, parent_page_before, parent_page_after, **kwargs):
+    invalidate_listings(parent_page_before.id, parent_page_after.id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    on_commit(BlogListing.invalidate_tag_indexes)
+
+
+@receiver(post_save, sender=get_image_model())
+@receiver(post_delete, sender=get_image_model())
+def image_changed(sender, instance, **kwargs):
+    # Latest post thumbnails are cached as rendition URLs.
+    on_commit(BlogListing.invalidate_latest_posts)
@@ -0,0 +1,46 @@
+from django import template
+from django.db.models import Count
+
+from taggit.models import Tag
+
+from base.page_cache import model_tag, record
+from blog.models import BlogListing, Category, category_url
+
+
+register = template.Library()
+
+
+def get_listing(context):
+    listing = context.get("listing") or context.get("self")
+    return listing if isinstance(listing, BlogListing) else None
+
+
+@register.simple_tag(takes_context=True)
+def blog_tags_exist(context):
+    record(model_tag(Tag))
+    return bool(context.get("tags"))
+
+
+@register.inclusion_tag("blog/tags/get_tags.html", takes_context=True)
+def get_tags(context):
+    record(model_tag(Tag))
+    return {"tags": context.get("tags", [])}
+
+
+@register.simple_tag(takes_context=False)
+def categories_exist():
+    record(model_tag(Category))
+    return Category.objects.exists()
+
+
+@register.inclusion_tag("blog/tags/categories.html", takes_context=True)
+def get_categories(context, parent=None):
+    record(model_tag(Category))
+    listing = get_listing(context)
+    categories = Category.objects.annotate(
+        post_count=Count("category_blog_relationship")
+    ).order_by("name")
+    base_url = listing.get_url(context.get("request")) if listing else ""
+    for category in categories:
+        category.url = category_url(base_url, category)
+    return {"categories": categories}
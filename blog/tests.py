@@ -1,3 +1,319 @@
-from django.test import TestCase
+import datetime
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Page
+
+from taggit.models import Tag
+
+from base.images import get_filter_specs
+from base.models import GenericSettings
+
+from .models import (
+    Author,
+    BlogAuthorRelationship,
+    BlogCategoryRelationship,
+    BlogListing,
+    BlogPage,
+    Category,
+)
+from .pagination import CursorPaginator
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PostCardQueryTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Created on the first render otherwise, which resets the footer cache.
+        GenericSettings.load()
+        home = Page.objects.get(depth=2)
+        self.listing = BlogListing(title="Blog", slug="blog", posts_per_page=2)
+        home.add_child(instance=self.listing)
+
+        image = get_image_model().objects.create(
+            title="Cover", file=get_test_image_file()
+        )
+        author = Author.objects.create(first_name="Jane", last_name="Doe")
+        category = Category.objects.create(name="news")
+        for i in range(8):
+            post = BlogPage(
+                title=f"Post {i}",
+                slug=f"post-{i}",
+                image=image,
+                date_published=datetime.date(2024, 1, 1 + i),
+            )
+            self.listing.add_child(instance=post)
+            post.tags.add("phones", f"tag-{i}")
+            BlogAuthorRelationship.objects.create(page=post, author=author)
+            BlogCategoryRelationship.objects.create(page=post, category=category)
+            post.save_revision().publish()
+
+    def count_queries(self, posts_per_page):
+        self.listing.posts_per_page = posts_per_page
+        self.listing.save()
+        # The first render generates renditions and fills the caches.
+        self.client.get("/blog/")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/blog/")
+        self.assertEqual(len(response.context["posts"]), posts_per_page)
+        return len(queries)
+
+    def test_query_count_is_independent_of_page_size(self):
+        self.assertEqual(self.count_queries(2), self.count_queries(6))
+
+    def test_post_cards_are_prefetched(self):
+        image = get_image_model().objects.get()
+        image.get_renditions(*get_filter_specs("post", image))
+        posts = self.listing.prefetch_post_cards(self.listing.get_posts()[:4])
+        with self.assertNumQueries(0):
+            for post in posts:
+                post.authors()
+                post.categories
+                post.get_tags
+                post.image.get_renditions(*get_filter_specs("post", post.image))
+
+
+class ListingDeleteTests(TestCase):
+    def test_delete_listing_with_posts(self):
+        home = Page.objects.get(depth=2)
+        listing = BlogListing(title="Blog", slug="blog")
+        home.add_child(instance=listing)
+        post = BlogPage(title="Post", slug="post")
+        listing.add_child(instance=post)
+        post.tags.add("phones")
+        post.save_revision().publish()
+        # Fill the caches the post's signal handlers update.
+        listing.get_tag_index()
+        listing.get_latest_posts()
+
+        listing.delete()
+
+        self.assertFalse(BlogPage.objects.exists())
+        self.assertFalse(BlogListing.objects.exists())
+
+
+class TagIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        home = Page.objects.get(depth=2)
+        self.listing = BlogListing(title="Blog", slug="blog")
+        home.add_child(instance=self.listing)
+        for i in range(3):
+            self.add_post(f"post-{i}", "phones", f"tag-{i}")
+
+    def add_post(self, slug, *tags, live=True):
+        post = BlogPage(title=slug, slug=slug, live=live)
+        self.listing.add_child(instance=post)
+        post.tags.add(*tags)
+        post.save()
+        return post
+
+    def get_counts(self):
+        return {
+            entry["slug"]: entry["count"]
+            for entry in self.listing.get_tag_index().values()
+        }
+
+    def test_build_is_one_query(self):
+        with self.assertNumQueries(1):
+            tag_index = self.listing.build_tag_index()
+        self.assertEqual(
+            {entry["slug"]: entry["count"] for entry in tag_index.values()},
+            {"phones": 3, "tag-0": 1, "tag-1": 1, "tag-2": 1},
+        )
+
+    def test_publish_and_unpublish_update_the_counts(self):
+        self.assertEqual(self.get_counts()["phones"], 3)
+        post = self.add_post("draft", "phones", "tablets", live=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save_revision().publish()
+        counts = self.get_counts()
+        self.assertEqual((counts["phones"], counts["tablets"]), (4, 1))
+
+        post.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            post.unpublish()
+        counts = self.get_counts()
+        self.assertEqual(counts["phones"], 3)
+        self.assertNotIn("tablets", counts)
+
+    def test_index_read_before_commit_is_not_kept(self):
+        self.get_counts()
+        post = self.add_post("draft", "phones", live=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save_revision().publish()
+            # Another request rebuilding before the publish commits.
+            self.get_counts()
+        self.assertEqual(self.get_counts()["phones"], 4)
+
+
+class LatestPostsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        home = Page.objects.get(depth=2)
+        self.listing = BlogListing(title="Blog", slug="blog")
+        home.add_child(instance=self.listing)
+        self.posts = [self.add_post(day) for day in range(1, 8)]
+
+    def add_post(self, day, live=True):
+        return self.listing.add_child(
+            instance=BlogPage(
+                title=f"Post {day}",
+                slug=f"post-{day}",
+                date_published=datetime.date(2024, 1, day),
+                live=live,
+            )
+        )
+
+    def get_slugs(self, exclude=None):
+        return [post["slug"] for post in self.listing.get_latest_posts(exclude)]
+
+    def test_newest_first_and_bounded(self):
+        self.assertEqual(
+            self.get_slugs(), ["post-7", "post-6", "post-5", "post-4", "post-3"]
+        )
+        # A post page leaves itself out and still shows a full list.
+        self.assertEqual(
+            self.get_slugs(exclude=self.posts[6].id),
+            ["post-6", "post-5", "post-4", "post-3", "post-2"],
+        )
+
+    def test_publishing_a_newer_post(self):
+        self.get_slugs()
+        post = self.add_post(9, live=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save_revision().publish()
+        self.assertEqual(self.get_slugs()[:2], ["post-9", "post-7"])
+
+    def test_unpublishing_a_listed_post_refills_the_list(self):
+        self.get_slugs()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[4].unpublish()
+        self.assertEqual(
+            self.get_slugs(), ["post-7", "post-6", "post-4", "post-3", "post-2"]
+        )
+
+    def test_refill_after_eviction(self):
+        listed = self.get_slugs()
+        cache.clear()
+        self.assertEqual(self.get_slugs(), listed)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[6].delete()
+        cache.clear()
+        self.assertEqual(self.get_slugs(), listed[1:] + ["post-2"])
+
+
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        home = Page.objects.get(depth=2)
+        self.listing = BlogListing(title="Blog", slug="blog")
+        home.add_child(instance=self.listing)
+        # Ties on the date, and undated posts that come last.
+        dates = [None, datetime.date(2024, 1, 2), None, datetime.date(2024, 1, 1)]
+        dates += [datetime.date(2024, 1, 2), datetime.date(2024, 1, 3), None]
+        for i, date in enumerate(dates):
+            self.listing.add_child(
+                instance=BlogPage(
+                    title=f"Post {i}", slug=f"post-{i}", date_published=date
+                )
+            )
+        posts = BlogPage.objects.all()
+        self.expected = sorted(
+            posts,
+            key=lambda post: (
+                post.date_published is not None,
+                post.date_published or datetime.date.min,
+                post.id,
+            ),
+            reverse=True,
+        )
+        self.paginator = CursorPaginator(self.listing.get_posts(), 3)
+
+    def ids(self, page):
+        return [post.id for post in page]
+
+    def test_get_posts_puts_undated_posts_last(self):
+        self.assertEqual(list(self.listing.get_posts()), self.expected)
+
+    def test_pages_forward_and_back(self):
+        pages = [self.paginator.page()]
+        while pages[-1].has_next():
+            pages.append(self.paginator.page(pages[-1].next_cursor))
+        self.assertEqual([page.number for page in pages], [1, 2, 3])
+        self.assertEqual([post for page in pages for post in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+        page = pages[-1]
+        for previous in reversed(pages[:-1]):
+            page = self.paginator.page(page.previous_cursor)
+            self.assertEqual(self.ids(page), self.ids(previous))
+            self.assertEqual(page.number, previous.number)
+        self.assertFalse(page.has_previous())
+
+    def test_invalid_cursor_gives_the_first_page(self):
+        first = self.paginator.page()
+        cursor = self.paginator.page(first.next_cursor).next_cursor
+        for bad in (cursor[:-2] + "xx", "garbage", cursor.swapcase()):
+            page = self.paginator.page(bad)
+            self.assertEqual(page.number, 1)
+            self.assertEqual(self.ids(page), self.ids(first))
+
+    def test_stale_cursor_gives_the_first_page(self):
+        first = self.paginator.page()
+        cursor = self.paginator.page(first.next_cursor).next_cursor
+        BlogPage.objects.get(pk=self.expected[6].pk).delete()
+        page = self.paginator.page(cursor)
+        self.assertEqual(page.number, 1)
+        self.assertEqual(self.ids(page), self.ids(first))
+
+    def test_invalid_cursor_in_the_listing(self):
+        response = self.client.get(self.listing.url, {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PostPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        GenericSettings.load()
+        listing = BlogListing(title="Blog", slug="blog")
+        Page.objects.get(depth=2).add_child(instance=listing)
+        post = BlogPage(title="Post", slug="post")
+        listing.add_child(instance=post)
+        post.tags.add("phones")
+        post.save_revision().publish()
+
+    def get(self):
+        return self.client.get("/blog/post/")
+
+    def assertPurgedBy(self, change, text):
+        self.assertEqual(self.get()["X-Page-Cache"], "miss")
+        self.assertEqual(self.get()["X-Page-Cache"], "hit")
+        change()
+        response = self.get()
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, text)
+
+    def test_new_category_purges_the_sidebar(self):
+        self.assertPurgedBy(lambda: Category.objects.create(name="Zebras"), "Zebras")
+
+    def test_renamed_tag_purges_the_post(self):
+        def rename():
+            tag = Tag.objects.get(name="phones")
+            tag.name = "handsets"
+            tag.save()
+
+        self.assertPurgedBy(rename, "handsets")
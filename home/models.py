@@ -9,13 +9,18 @@ from wagtail.admin.panels import (
     MultipleChooserPanel,
 )
 from wagtail.fields import RichTextField, StreamField
+from wagtail.images import get_image_model
 
 from modelcluster.fields import ParentalKey
 
+from base.page_cache import CachedPageMixin, model_tag, object_tag, record, tag_for
+from pricing.models import PricingFeature, get_pricing_matrix
 from services.models import Service
 
+from .sections import load_home_sections
 
-class HomePage(Page):
+
+class HomePage(CachedPageMixin, Page):
     # ********************* Hero Section ***********************
     hero_welcome_text = models.CharField(
         verbose_name="Hero Welcome Text",
@@ -388,15 +393,57 @@ class HomePage(Page):
     ]
     page_description = "The homepage serves as the landing page for the website. Customize it to showcase key content, introduce visitors to your site, and provide an engaging starting point for their journey."
 
+    def get_cache_tags(self):
+        tags = super().get_cache_tags()
+        for image_id in (self.hero_image_id, self.cta_image_id):
+            if image_id:
+                tags.append(object_tag(get_image_model(), image_id))
+        for page_id in (
+            self.hero_cta_link_id,
+            self.about_cta_link_id,
+            self.cta_link_id,
+        ):
+            if page_id:
+                tags.append(object_tag(Page, page_id))
+        return tags
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        context["sections"] = load_home_sections(self, request)
+        return context
+
     def services(self):
-        return [
-            n.service for n in self.home_service_relation.all().select_related("service")
+        services = [
+            n.service
+            for n in self.home_service_relation.all().select_related(
+                "service", "service__link"
+            )
         ]
+        for service in services:
+            record(
+                tag_for(service), service.link_id and object_tag(Page, service.link_id)
+            )
+        return services
 
     def features(self):
-        return [
-            n.feature for n in self.home_feature_relation.all().select_related("feature")
+        features = [
+            n.feature
+            for n in self.home_feature_relation.all().select_related(
+                "feature", "feature__link"
+            )
         ]
+        for feature in features:
+            record(
+                tag_for(feature), feature.link_id and object_tag(Page, feature.link_id)
+            )
+        return features
+
+    def pricing(self):
+        pricing = get_pricing_matrix(self)
+        record(model_tag(PricingFeature))
+        for tier in pricing.tiers:
+            record(tier["cta_link_id"] and object_tag(Page, tier["cta_link_id"]))
+        return pricing
 
 
 class AboutList(models.Model):
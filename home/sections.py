@@ -0,0 +1,74 @@
+from wagtail.images import get_image_model
+from wagtail.models import Page
+
+from base.images import get_filter_specs
+from base.page_cache import object_tag, record
+
+CTA_IMAGE_FILTER = get_filter_specs("cta")[0]
+
+
+class HomeSections:
+    """
+    Everything the home page sections render beyond the page's own fields,
+    loaded up front by load_home_sections(). Read-only, so templates and
+    tags cannot end up querying through it.
+    """
+
+    __slots__ = (
+        "hero_cta_url",
+        "about_cta_url",
+        "about_list",
+        "services",
+        "features",
+        "cta_image",
+        "cta_url",
+        "pricing",
+        "faqs",
+    )
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+
+def load_home_sections(page, request=None):
+    """
+    Load the related data of every home page section in a fixed number of
+    queries, however many services, features, FAQs or tiers there are:
+    the linked pages, the CTA image with its rendition, the about list,
+    services, features, FAQs and the pricing matrix.
+    """
+    link_ids = {page.hero_cta_link_id, page.about_cta_link_id, page.cta_link_id}
+    link_ids.discard(None)
+    links = Page.objects.in_bulk(link_ids) if link_ids else {}
+    record(*[object_tag(Page, pk) for pk in link_ids])
+
+    def link_url(pk):
+        link = links.get(pk)
+        return link.get_url(request) if link else None
+
+    cta_image = None
+    if page.cta_image_id:
+        image = (
+            get_image_model()
+            .objects.prefetch_renditions(CTA_IMAGE_FILTER)
+            .filter(pk=page.cta_image_id)
+            .first()
+        )
+        if image:
+            cta_image = image.get_rendition(CTA_IMAGE_FILTER)
+
+    return HomeSections(
+        hero_cta_url=link_url(page.hero_cta_link_id),
+        about_cta_url=link_url(page.about_cta_link_id),
+        about_list=tuple(page.about_listed_services.all()),
+        services=tuple(page.services()),
+        features=tuple(page.features()),
+        cta_image=cta_image,
+        cta_url=link_url(page.cta_link_id),
+        pricing=page.pricing(),
+        faqs=tuple(page.faqs.all()),
+    )
@@ -0,0 +1,123 @@
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+
+from base import page_cache
+from base.models import GenericSettings, StandardPage
+from features.models import Feature, HomeServiceRelation as HomeFeatureRelation
+from pricing.models import PricingFeature, PricingTier
+from services.models import HomeServiceRelation, Service
+
+from .models import AboutList, Faq, HomePage
+from .sections import load_home_sections
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class HomeSectionsQueryTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        # Created on the first render otherwise, which resets the footer cache.
+        GenericSettings.load()
+        self.home = HomePage.objects.get()
+        self.link = StandardPage(title="Contact", slug="contact")
+        self.home.add_child(instance=self.link)
+        self.home.hero_cta_link = self.link
+        self.home.about_cta_link = self.link
+        self.home.cta_link = self.link
+        self.home.cta_image = get_image_model().objects.create(
+            title="Background", file=get_test_image_file()
+        )
+        self.home.save()
+
+    def populate(self, count):
+        """Give every section of the home page ``count`` items."""
+        features = [PricingFeature.objects.create(name=f"Feature {i}") for i in range(count)]
+        for i in range(count):
+            AboutList.objects.create(page=self.home, text=f"Point {i}")
+            Faq.objects.create(page=self.home, question=f"Q{i}?", answer=f"A{i}.")
+            service = Service.objects.create(title=f"Service {i}", link=self.link)
+            HomeServiceRelation.objects.create(page=self.home, service=service)
+            feature = Feature.objects.create(name=f"Feature {i}", link=self.link)
+            HomeFeatureRelation.objects.create(page=self.home, feature=feature)
+            tier = PricingTier.objects.create(
+                page=self.home, name=f"Tier {i}", price=i, cta_link=self.link
+            )
+            tier.pricing_features.set(features[: i + 1])
+            tier.save()
+
+    def count_queries(self):
+        # Generate the CTA rendition first, then measure with cold caches.
+        load_home_sections(HomePage.objects.get())
+        cache.clear()
+        home = HomePage.objects.get()
+        with CaptureQueriesContext(connection) as queries:
+            load_home_sections(home)
+        return len(queries)
+
+    def test_sections_load_in_a_fixed_number_of_queries(self):
+        self.populate(1)
+        small = self.count_queries()
+        self.populate(5)
+        self.assertEqual(self.count_queries(), small)
+
+    def test_home_page_query_count_is_independent_of_content(self):
+        self.populate(1)
+        self.client.get("/")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/")
+        small = len(queries)
+
+        self.populate(5)
+        self.client.get("/")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/")
+        self.assertEqual(len(queries), small)
+        self.assertEqual(len(response.context["sections"].services), 6)
+
+    def test_sections_are_read_only(self):
+        sections = load_home_sections(HomePage.objects.get())
+        with self.assertRaises(AttributeError):
+            sections.services = ()
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        GenericSettings.load()
+        self.home = HomePage.objects.get()
+
+    def test_hit_until_purged(self):
+        self.assertEqual(self.client.get("/")["X-Page-Cache"], "miss")
+        self.assertEqual(self.client.get("/")["X-Page-Cache"], "hit")
+        page_cache.purge(page_cache.tag_for(self.home))
+        self.assertEqual(self.client.get("/")["X-Page-Cache"], "miss")
+
+    def test_purge_reaches_every_entry_of_a_tag(self):
+        # Entries stored one after another under the same tag used to
+        # overwrite each other in a shared tag index.
+        self.client.get("/")
+        self.client.get("/?page=2")
+        page_cache.purge(page_cache.tag_for(self.home))
+        self.assertEqual(self.client.get("/")["X-Page-Cache"], "miss")
+        self.assertEqual(self.client.get("/?page=2")["X-Page-Cache"], "miss")
+
+    def test_purge_during_render_is_not_lost(self):
+        tag = page_cache.tag_for(self.home)
+        versions = page_cache.get_tag_versions([tag])
+        page_cache.purge(tag)
+        self.assertFalse(page_cache.is_current({"versions": versions}))
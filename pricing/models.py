@@ -1,11 +1,19 @@
+import uuid
+
 from django.db import models
 from django import forms
+from django.core.cache import cache
 from modelcluster.fields import ParentalKey, ParentalManyToManyField
+from modelcluster.models import ClusterableModel
 from wagtail.admin.panels import MultiFieldPanel, FieldRowPanel, FieldPanel
 from wagtail.snippets.models import register_snippet
 from wagtail.models import Orderable
 
-class PricingTier(Orderable, models.Model):
+PRICING_MATRIX_CACHE_KEY = "pricing:matrix:{}"
+PRICING_MATRIX_CACHE_TIMEOUT = 60 * 60 * 24
+PRICING_VERSION_KEY = "pricing:version"
+
+class PricingTier(Orderable, ClusterableModel):
     name = models.CharField(
         max_length=50,
         verbose_name="Tier Name",
@@ -95,3 +103,100 @@ class PricingFeature(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class PricingMatrix:
+    """
+    The pricing tiers of a page against the whole feature catalogue.
+    ``matrix[i][j]`` tells whether tier ``i`` includes feature ``j``.
+    """
+
+    def __init__(self, tiers, features, matrix):
+        self.tiers = tiers
+        self.features = features
+        self.matrix = matrix
+
+    def __bool__(self):
+        return bool(self.tiers)
+
+    def rows(self):
+        """Each tier with the names of its included and excluded features."""
+        for tier, row in zip(self.tiers, self.matrix):
+            included = [f["name"] for f, has in zip(self.features, row) if has]
+            excluded = [f["name"] for f, has in zip(self.features, row) if not has]
+            yield dict(tier, included=included, excluded=excluded)
+
+
+def build_pricing_matrix(page):
+    """
+    Build the PricingMatrix of ``page`` in three queries: its tiers, the
+    feature catalogue and the tier/feature links. A page being previewed
+    carries its tiers in memory, so those are read from the page instead.
+    """
+    in_memory = "pricing_tiers" in getattr(page, "_cluster_related_objects", {})
+    if in_memory:
+        tiers = list(page.pricing_tiers.all())
+        links = {
+            (index, feature.pk)
+            for index, tier in enumerate(tiers)
+            for feature in tier.pricing_features.all()
+        }
+    else:
+        tiers = list(
+            PricingTier.objects.filter(page=page).select_related("cta_link")
+        )
+        positions = {tier.pk: index for index, tier in enumerate(tiers)}
+        rows = PricingTier.pricing_features.through.objects.filter(
+            pricingtier__in=positions
+        ).values_list("pricingtier_id", "pricingfeature_id")
+        links = {(positions[tier_id], feature_id) for tier_id, feature_id in rows}
+
+    features = list(PricingFeature.objects.order_by("pk").values("id", "name"))
+    matrix = [
+        tuple((index, feature["id"]) in links for feature in features)
+        for index in range(len(tiers))
+    ]
+    tiers = [
+        {
+            "name": tier.name,
+            "price": tier.price,
+            "is_special": tier.is_special,
+            "special_name": tier.special_name,
+            "cta_text": tier.cta_text,
+            "cta_link_id": tier.cta_link_id,
+            "cta_url": tier.cta_link.url if tier.cta_link else None,
+        }
+        for tier in tiers
+    ]
+    return PricingMatrix(tiers, features, matrix)
+
+
+def get_pricing_version():
+    version = cache.get(PRICING_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(PRICING_VERSION_KEY, version, None):
+            version = cache.get(PRICING_VERSION_KEY, version)
+    return version
+
+
+def get_pricing_matrix(page):
+    """
+    Return the PricingMatrix of ``page``, cached per live revision. Tiers
+    only change with a new revision; changes to the feature catalogue or to
+    linked pages go through invalidate_pricing_matrices().
+    """
+    if "pricing_tiers" in getattr(page, "_cluster_related_objects", {}):
+        return build_pricing_matrix(page)
+    key = PRICING_MATRIX_CACHE_KEY.format(
+        f"{page.pk}:{page.live_revision_id}:{get_pricing_version()}"
+    )
+    pricing = cache.get(key)
+    if pricing is None:
+        pricing = build_pricing_matrix(page)
+        cache.set(key, pricing, PRICING_MATRIX_CACHE_TIMEOUT)
+    return pricing
+
+
+def invalidate_pricing_matrices():
+    cache.set(PRICING_VERSION_KEY, uuid.uuid4().hex, None)
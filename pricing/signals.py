@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from .models import PricingFeature, PricingTier, invalidate_pricing_matrices
+
+
+def invalidate_on_commit():
+    # After commit, so a rebuild can't cache the matrix from before it.
+    transaction.on_commit(invalidate_pricing_matrices)
+
+
+@receiver(post_save, sender=PricingFeature)
+@receiver(post_delete, sender=PricingFeature)
+@receiver(post_save, sender=PricingTier)
+@receiver(post_delete, sender=PricingTier)
+def pricing_changed(sender, instance, **kwargs):
+    invalidate_on_commit()
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(pre_delete)
+def page_changed(sender, instance, **kwargs):
+    # Tiers keep the URL of their CTA page, which may sit below this one.
+    if not isinstance(instance, Page):
+        return
+    if PricingTier.objects.filter(cta_link__path__startswith=instance.path).exists():
+        invalidate_on_commit()
+
+
+@receiver(post_page_move)
+def page_moved(sender, instance, **kwargs):
+    invalidate_on_commit()
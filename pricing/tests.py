@@ -1,3 +1,80 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from base.models import StandardPage
+from home.models import HomePage
+
+from .models import (
+    PricingFeature,
+    PricingTier,
+    build_pricing_matrix,
+    get_pricing_matrix,
+)
+
+
+class PricingMatrixTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.home = HomePage.objects.get()
+        self.link = StandardPage(title="Contact", slug="contact")
+        self.home.add_child(instance=self.link)
+        self.features = [
+            PricingFeature.objects.create(name=f"Feature {i}") for i in range(3)
+        ]
+        for i in range(3):
+            tier = PricingTier.objects.create(
+                page=self.home, name=f"Tier {i}", price=i, cta_link=self.link
+            )
+            tier.pricing_features.set(self.features[: i + 1])
+            tier.save()
+
+    def get_rows(self):
+        home = HomePage.objects.get()
+        rows = get_pricing_matrix(home).rows()
+        return [(row["name"], row["included"]) for row in rows]
+
+    def test_build_is_three_queries(self):
+        # Resolve the CTA page URL once; sites are cached apart.
+        build_pricing_matrix(self.home)
+        with self.assertNumQueries(3):
+            pricing = build_pricing_matrix(self.home)
+        self.assertEqual(
+            pricing.matrix,
+            [(True, False, False), (True, True, False), (True, True, True)],
+        )
+        self.assertEqual(pricing.tiers[0]["cta_url"], self.link.url)
+
+    def test_cached_until_changed(self):
+        self.get_rows()
+        home = HomePage.objects.get()
+        with self.assertNumQueries(0):
+            get_pricing_matrix(home)
+
+    def test_feature_edit_invalidates(self):
+        self.get_rows()
+        self.features[0].name = "Screen repair"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.features[0].save()
+        self.assertEqual(self.get_rows()[0], ("Tier 0", ["Screen repair"]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.features[1].delete()
+        self.assertEqual(self.get_rows()[1], ("Tier 1", ["Screen repair"]))
+
+    def test_tier_edit_invalidates(self):
+        self.get_rows()
+        tier = PricingTier.objects.get(name="Tier 0")
+        tier.name = "Basic"
+        with self.captureOnCommitCallbacks(execute=True):
+            tier.save()
+        self.assertEqual(self.get_rows()[0], ("Basic", ["Feature 0"]))
+
+    def test_published_tier_changes_invalidate(self):
+        self.get_rows()
+        home = HomePage.objects.get()
+        tiers = list(home.pricing_tiers.all())
+        tiers[2].pricing_features = self.features[2:]
+        home.pricing_tiers = tiers
+        with self.captureOnCommitCallbacks(execute=True):
+            home.save_revision().publish()
+        self.assertEqual(self.get_rows()[2], ("Tier 2", ["Feature 2"]))
@@ -0,0 +1,204 @@
+import threading
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+
+from taggit.models import Tag
+from wagtail.models import Page
+
+from blog.models import BlogListing, BlogPage, Category, category_url, tag_url
+
+from .results import normalize_query
+
+AUTOCOMPLETE_SEQ_KEY = "search:autocomplete:seq"
+AUTOCOMPLETE_CHANGE_KEY = "search:autocomplete:change:{}"
+AUTOCOMPLETE_CHANGE_TIMEOUT = 60 * 60
+# A worker further behind than this rebuilds rather than catching up.
+AUTOCOMPLETE_MAX_CHANGES = 500
+
+# Short prefixes match many keys; ranking looks at no more than this many.
+AUTOCOMPLETE_MAX_SCAN = 2000
+
+# Pages first, then categories, then tags, for equally good matches.
+KIND_RANK = {"page": 0, "category": 1, "tag": 2}
+
+_lock = threading.Lock()
+_index = None
+_seq = None
+
+
+class PrefixIndex:
+    """
+    A sorted array of (word suffix of a label, entry key) pairs, so that a
+    prefix lookup is a binary search plus a short scan. "iPhone screen
+    repair" can be found by "iph", "scr" and "rep".
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def copy(self):
+        index = PrefixIndex()
+        index.keys = list(self.keys)
+        index.entries = dict(self.entries)
+        return index
+
+    @staticmethod
+    def get_keys(label):
+        words = normalize_query(label).split()
+        return [" ".join(words[i:]) for i in range(len(words))]
+
+    def add(self, entry_key, suggestion):
+        self.remove(entry_key)
+        self.entries[entry_key] = suggestion
+        for key in self.get_keys(suggestion["label"]):
+            insort(self.keys, (key, entry_key))
+
+    def remove(self, entry_key):
+        suggestion = self.entries.pop(entry_key, None)
+        if suggestion is None:
+            return
+        for key in self.get_keys(suggestion["label"]):
+            i = bisect_left(self.keys, (key, entry_key))
+            if i < len(self.keys) and self.keys[i] == (key, entry_key):
+                del self.keys[i]
+
+    def search(self, query, limit):
+        prefix = normalize_query(query)
+        if not prefix:
+            return []
+        found = {}
+        i = bisect_left(self.keys, (prefix,))
+        end = min(len(self.keys), i + AUTOCOMPLETE_MAX_SCAN)
+        while i < end and self.keys[i][0].startswith(prefix):
+            key, entry_key = self.keys[i]
+            # A match at the start of the label beats one further in.
+            starts = key == self.entries[entry_key]["key"]
+            if entry_key not in found or starts:
+                found[entry_key] = starts
+            i += 1
+        ranked = sorted(
+            found.items(),
+            key=lambda item: (
+                not item[1],
+                KIND_RANK[self.entries[item[0]]["kind"]],
+                len(self.entries[item[0]]["label"]),
+                self.entries[item[0]]["label"],
+            ),
+        )
+        return [
+            {name: self.entries[entry_key][name] for name in ("label", "url", "kind")}
+            for entry_key, _ in ranked[:limit]
+        ]
+
+
+def make_suggestion(kind, label, url):
+    return {"kind": kind, "label": label, "url": url, "key": normalize_query(label)}
+
+
+def get_listing_url():
+    listing = BlogListing.objects.live().first()
+    return listing.get_url() if listing else None
+
+
+def index_page(index, page, listing_url):
+    index.add(("page", page.pk), make_suggestion("page", page.title, page.get_url()))
+    # Tags are only added here; an unused tag stays until the next rebuild.
+    if listing_url and isinstance(page, BlogPage):
+        for tag in page.tags.all():
+            index_tag(index, tag, listing_url)
+
+
+def build_index():
+    """Index the titles of all live pages and the blog tags and categories."""
+    index = PrefixIndex()
+    pages = Page.objects.live().filter(depth__gt=1).only(
+        "id", "title", "path", "depth", "url_path"
+    )
+    for page in pages.iterator(chunk_size=2000):
+        index.add(("page", page.pk), make_suggestion("page", page.title, page.get_url()))
+
+    listing_url = get_listing_url()
+    if listing_url:
+        tags = Tag.objects.filter(
+            blog_blogpagetag_items__content_object__live=True
+        ).distinct()
+        for tag in tags:
+            index_tag(index, tag, listing_url)
+        for category in Category.objects.all():
+            index_category(index, category, listing_url)
+    return index
+
+
+def index_tag(index, tag, listing_url):
+    index.add(("tag", tag.pk), make_suggestion("tag", tag.name, tag_url(listing_url, tag)))
+
+
+def index_category(index, category, listing_url):
+    index.add(
+        ("category", category.pk),
+        make_suggestion("category", category.name, category_url(listing_url, category)),
+    )
+
+
+def apply_change(index, kind, pk):
+    """Bring one entry up to date with the database."""
+    index.remove((kind, pk))
+    listing_url = get_listing_url()
+    if kind == "page":
+        page = Page.objects.live().filter(pk=pk).specific().first()
+        if page is not None:
+            index_page(index, page, listing_url)
+    elif kind == "category" and listing_url:
+        category = Category.objects.filter(pk=pk).first()
+        if category is not None:
+            index_category(index, category, listing_url)
+
+
+def record_change(kind, pk=None):
+    """
+    Tell every worker's index that an entry changed. Changes are numbered
+    in the cache; each worker applies the ones it hasn't seen on its next
+    lookup. kind "rebuild" makes them start over.
+    """
+    try:
+        seq = cache.incr(AUTOCOMPLETE_SEQ_KEY)
+    except ValueError:
+        cache.add(AUTOCOMPLETE_SEQ_KEY, 0, None)
+        seq = cache.incr(AUTOCOMPLETE_SEQ_KEY)
+    cache.set(AUTOCOMPLETE_CHANGE_KEY.format(seq), (kind, pk), AUTOCOMPLETE_CHANGE_TIMEOUT)
+
+
+def get_index():
+    global _index, _seq
+    seq = cache.get(AUTOCOMPLETE_SEQ_KEY)
+    if seq is None:
+        cache.add(AUTOCOMPLETE_SEQ_KEY, 0, None)
+        seq = cache.get(AUTOCOMPLETE_SEQ_KEY, 0)
+
+    with _lock:
+        if _index is not None and seq == _seq:
+            return _index
+        changes = None
+        if _index is not None and _seq < seq <= _seq + AUTOCOMPLETE_MAX_CHANGES:
+            keys = [AUTOCOMPLETE_CHANGE_KEY.format(n) for n in range(_seq + 1, seq + 1)]
+            found = cache.get_many(keys)
+            if len(found) == len(keys):
+                changes = [found[key] for key in keys]
+        if changes is None or any(kind == "rebuild" for kind, _ in changes):
+            index = build_index()
+        else:
+            # Other threads may be reading the current index.
+            index = _index.copy()
+            for kind, pk in dict.fromkeys(changes):
+                apply_change(index, kind, pk)
+        _index, _seq = index, seq
+        return _index
+
+
+def suggest(query, limit=8):
+    return get_index().search(query, limit)
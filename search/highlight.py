@@ -0,0 +1,74 @@
+import re
+
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from wagtail.search import index
+
+WORD_RE = re.compile(r"\w+")
+SNIPPET_LENGTH = 240
+
+
+def get_search_text(page):
+    """
+    The indexed text of a specific page, other than its title: the search
+    description, then its search fields from the highest boost down.
+    """
+    # Related fields (tags, categories) are left out: reading them would
+    # cost a query per page.
+    fields = [
+        field
+        for field in page.get_search_fields()
+        if isinstance(field, index.SearchField) and field.field_name != "title"
+    ]
+    fields.sort(key=lambda field: field.boost or 0, reverse=True)
+
+    parts = [page.search_description]
+    for field in fields:
+        value = field.get_value(page)
+        if isinstance(value, list):
+            # StreamField: the text of its blocks.
+            parts.extend(value)
+        elif value:
+            parts.append(str(value))
+    return " ".join(strip_tags(str(part)) for part in parts if part)
+
+
+def get_terms_re(query):
+    terms = {term.lower() for term in WORD_RE.findall(query or "") if len(term) > 1}
+    if not terms:
+        return None
+    # Match words starting with a term, which covers most stemmed forms.
+    alternatives = "|".join(sorted(map(re.escape, terms), key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\w*", re.IGNORECASE)
+
+
+def highlight(text, query, length=SNIPPET_LENGTH):
+    """
+    An HTML snippet of ``text`` around the first word matching ``query``,
+    with every matching word wrapped in <mark>.
+    """
+    text = " ".join(text.split())
+    terms_re = get_terms_re(query)
+    match = terms_re.search(text) if terms_re else None
+
+    start = 0
+    if match and match.start() > length // 3:
+        start = text.rfind(" ", 0, match.start() - length // 3) + 1
+    end = len(text)
+    if end - start > length:
+        end = text.rfind(" ", start, start + length)
+        if end <= start:
+            end = start + length
+    snippet = text[start:end]
+
+    html = []
+    position = 0
+    for word in terms_re.finditer(snippet) if terms_re else ():
+        html.append(escape(snippet[position : word.start()]))
+        html.append(f"<mark>{escape(word.group())}</mark>")
+        position = word.end()
+    html.append(escape(snippet[position:]))
+    return mark_safe(
+        ("… " if start else "") + "".join(html) + (" …" if end < len(text) else "")
+    )
@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from wagtail.contrib.search_promotions.models import Query, QueryDailyHits
+from wagtail.search.utils import normalise_query_string
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_hits = Counter()
+_flushed = time.monotonic()
+_flush_scheduled = False
+_executor = None
+
+
+def record_hit(query_string):
+    """
+    Count a search for ``query_string`` in this process. Nothing is written
+    until the next flush; a worker that exits loses at most the hits of one
+    flush interval.
+    """
+    query_string = normalise_query_string(query_string)
+    if not query_string:
+        return
+    with _lock:
+        _hits[query_string, timezone.now().date()] += 1
+    flush_hits_if_due()
+
+
+def flush_hits_if_due():
+    """
+    Flush the buffered hits in a background thread if
+    SEARCH_HITS_FLUSH_INTERVAL seconds have passed since the last flush, or
+    SEARCH_HITS_MAX_BUFFERED queries are waiting, so no request waits for
+    the writes or sees their errors. Returns whether a flush was scheduled.
+    """
+    global _executor, _flush_scheduled
+    interval = getattr(settings, "SEARCH_HITS_FLUSH_INTERVAL", 60)
+    max_buffered = getattr(settings, "SEARCH_HITS_MAX_BUFFERED", 1000)
+    with _lock:
+        if _flush_scheduled or not _hits:
+            return False
+        if time.monotonic() - _flushed < interval and len(_hits) < max_buffered:
+            return False
+        _flush_scheduled = True
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1)
+    _executor.submit(flush_hits_in_background)
+    return True
+
+
+def flush_hits_in_background():
+    global _flush_scheduled
+    try:
+        flush_hits()
+    except Exception:
+        logger.exception("Could not flush search queries")
+    finally:
+        with _lock:
+            _flush_scheduled = False
+        connection.close()
+
+
+def flush_hits():
+    """
+    Write the buffered hits to the search promotions Query and QueryDailyHits
+    tables: a query to create missing rows of each, one to read their ids
+    and one update per day adding the counts. Returns the number of hits
+    written. Hits that fail to write go back in the buffer.
+    """
+    global _hits, _flushed
+    with _lock:
+        hits, _hits = _hits, Counter()
+        _flushed = time.monotonic()
+    if not hits:
+        return 0
+
+    try:
+        with transaction.atomic():
+            write_hits(hits)
+    except Exception:
+        logger.exception("Could not write %d search queries", len(hits))
+        with _lock:
+            _hits.update(hits)
+        return 0
+    return sum(hits.values())
+
+
+def write_hits(hits):
+    query_strings = {query_string for query_string, _ in hits}
+    Query.objects.bulk_create(
+        [Query(query_string=query_string) for query_string in query_strings],
+        ignore_conflicts=True,
+    )
+    query_ids = dict(
+        Query.objects.filter(query_string__in=query_strings).values_list(
+            "query_string", "id"
+        )
+    )
+
+    by_date = {}
+    for (query_string, date), count in hits.items():
+        by_date.setdefault(date, {})[query_ids[query_string]] = count
+    QueryDailyHits.objects.bulk_create(
+        [
+            QueryDailyHits(query_id=query_id, date=date, hits=0)
+            for date, counts in by_date.items()
+            for query_id in counts
+        ],
+        ignore_conflicts=True,
+    )
+    for date, counts in by_date.items():
+        QueryDailyHits.objects.filter(date=date, query_id__in=counts).update(
+            hits=F("hits")
+            + Case(
+                *(When(query_id=query_id, then=Value(n)) for query_id, n in counts.items()),
+                default=Value(0),
+            )
+        )
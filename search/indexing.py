@@ -0,0 +1,173 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, transaction
+from django.utils import timezone
+
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend, get_search_backends
+from wagtail.search.index import class_is_indexed, get_indexed_models
+from wagtail.search.management.commands.update_index import group_models_by_index
+
+from .models import QueuedIndexUpdate
+from .results import invalidate_search_results
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def queue_index_update(instance):
+    """
+    Mark ``instance`` as changed for the update_search_index command, in
+    place of wagtail indexing it during the request. One upsert; saving it
+    again before the worker gets to it only moves queued_at.
+    """
+    if isinstance(instance, Page):
+        # Index the specific page, whichever class was saved or deleted.
+        content_type = ContentType.objects.get_for_id(instance.content_type_id)
+    else:
+        content_type = ContentType.objects.get_for_model(instance)
+    QueuedIndexUpdate.objects.bulk_create(
+        [
+            QueuedIndexUpdate(
+                content_type=content_type,
+                object_id=str(instance.pk),
+                queued_at=timezone.now(),
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["content_type", "object_id"],
+        update_fields=["queued_at"],
+    )
+
+
+def index_objects(model, object_ids):
+    """
+    Bring the index entries of ``model`` objects ``object_ids`` up to date in
+    every search backend: one bulk upsert per backend for the objects that
+    still exist, and a delete for each that doesn't.
+    """
+    objects = list(model.get_indexed_objects().filter(pk__in=object_ids))
+    found = {str(obj.pk) for obj in objects}
+    missing = [object_id for object_id in object_ids if object_id not in found]
+    # Wagtail's full rebuild also indexes pages under their parent classes.
+    models = [model] + [
+        parent for parent in model._meta.get_parent_list() if class_is_indexed(parent)
+    ]
+    for backend in get_search_backends():
+        backend.add_bulk(model, objects)
+        for object_id in missing:
+            for indexed_model in models:
+                backend.delete(indexed_model(pk=object_id))
+
+
+def process_index_queue(batch_size=None):
+    """
+    Index one batch of queued updates, oldest first, and return how many
+    there were. The batch is taken off the queue in a short transaction,
+    skipping rows locked by another worker on databases that support it,
+    and indexed after it commits: an editor saving one of its objects
+    meanwhile queues it again rather than waiting for the index. A batch
+    that fails to index goes back on the queue.
+    """
+    batch_size = batch_size or getattr(settings, "SEARCH_INDEX_BATCH_SIZE", 500)
+    with transaction.atomic():
+        updates = list(
+            QueuedIndexUpdate.objects.select_for_update(skip_locked=True).order_by(
+                "queued_at", "pk"
+            )[:batch_size]
+        )
+        QueuedIndexUpdate.objects.filter(
+            pk__in=[update.pk for update in updates]
+        ).delete()
+    if not updates:
+        return 0
+
+    by_model = {}
+    for update in updates:
+        model = ContentType.objects.get_for_id(update.content_type_id).model_class()
+        if model is not None and class_is_indexed(model):
+            by_model.setdefault(model, []).append(update.object_id)
+    try:
+        for model, object_ids in by_model.items():
+            index_objects(model, object_ids)
+    except Exception:
+        # Objects queued again since keep their newer row.
+        QueuedIndexUpdate.objects.bulk_create(updates, ignore_conflicts=True)
+        raise
+    finally:
+        invalidate_search_results()
+    return len(updates)
+
+
+def get_chunks(model, chunk_size):
+    pks = list(model.get_indexed_objects().order_by("pk").values_list("pk", flat=True))
+    for i in range(0, len(pks), chunk_size):
+        yield pks[i : i + chunk_size]
+
+
+def index_chunk(backend_name, model_label, pks):
+    """Index one chunk of a rebuild. Runs in a worker process."""
+    model = apps.get_model(model_label)
+    backend = get_search_backend(backend_name)
+    index = backend.get_index_for_model(model)
+    index.add_items(model, list(model.get_indexed_objects().filter(pk__in=pks)))
+    return model_label, len(pks)
+
+
+def rebuild_index(
+    backend_name="default", processes=1, chunk_size=DEFAULT_CHUNK_SIZE, log=None
+):
+    """
+    Rebuild a search backend's indexes like wagtail's update_index, but
+    with the chunks of every content type shared among ``processes`` worker
+    processes. Returns the number of objects indexed.
+    """
+    log = log or logger.info
+    backend = get_search_backend(backend_name)
+    if not backend.rebuilder_class:
+        log(f"Backend '{backend_name}' doesn't require rebuilding")
+        return 0
+    if processes > 1 and backend.rebuilder_class is getattr(
+        backend, "atomic_rebuilder_class", None
+    ):
+        raise ValueError("An ATOMIC_REBUILD runs in one transaction and process")
+
+    count = 0
+    for index, models in group_models_by_index(backend, get_indexed_models()).items():
+        rebuilder = backend.rebuilder_class(index)
+        index = rebuilder.start()
+        for model in models:
+            index.add_model(model)
+
+        tasks = [
+            (backend_name, model._meta.label, pks)
+            for model in models
+            for pks in get_chunks(model, chunk_size)
+        ]
+        if processes > 1:
+            # Forked workers must open their own database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                processes, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                done = executor.map(index_chunk, *zip(*tasks)) if tasks else []
+                for model_label, indexed in done:
+                    count += indexed
+                    log(f"{backend_name}: {model_label} +{indexed}")
+        else:
+            for task in tasks:
+                model_label, indexed = index_chunk(*task)
+                count += indexed
+                log(f"{backend_name}: {model_label} +{indexed}")
+
+        rebuilder.finish()
+
+    invalidate_search_results()
+    log(f"{backend_name}: indexed {count} objects")
+    return count
@@ -0,0 +1,118 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend
+from wagtail.search.backends.database.fallback import DatabaseSearchBackend
+
+from base.models import StandardPage
+from home.models import HomePage
+
+WORDS = (
+    "iphone samsung pixel huawei tecno infinix screen battery charging port "
+    "camera speaker microphone water damage repair replacement unlock "
+    "software update backup data recovery warranty original genuine "
+    "display glass crack touch button fast same day price quote shop "
+    "nairobi delivery accessories case protector charger cable earphones"
+).split()
+
+QUERIES = [
+    "iphone screen repair",
+    "battery replacement",
+    "water damage",
+    "samsung charging port",
+    "data recovery",
+    "unlock",
+]
+
+
+def make_text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the configured search backend (Postgres tsvector or SQLite "
+        "FTS5) against the unindexed fallback backend on the live pages, "
+        "optionally generating a synthetic corpus first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=0,
+            help="Create this many synthetic pages (deleted afterwards unless --keep).",
+        )
+        parser.add_argument("--keep", action="store_true")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--query", action="append", help="A query to time (repeatable)."
+        )
+        parser.add_argument("--operator", choices=["or", "and"], default="or")
+
+    def handle(self, *args, **options):
+        corpus = None
+        if options["pages"]:
+            corpus = self.create_corpus(options["pages"], options["seed"])
+        try:
+            self.benchmark(
+                options["query"] or QUERIES, options["repeat"], options["operator"]
+            )
+        finally:
+            if corpus is not None and not options["keep"]:
+                self.stdout.write("Deleting the corpus…")
+                corpus.delete()
+
+    def create_corpus(self, count, seed):
+        rng = random.Random(seed)
+        home = HomePage.objects.first() or Page.get_first_root_node()
+        with transaction.atomic():
+            corpus = home.add_child(
+                instance=StandardPage(title="Search benchmark", slug="search-benchmark")
+            )
+        start = time.perf_counter()
+        # Pages are indexed as they are saved.
+        for i in range(count):
+            with transaction.atomic():
+                corpus.add_child(
+                    instance=StandardPage(
+                        title=make_text(rng, 4).capitalize(),
+                        slug=f"benchmark-{i}",
+                        introduction=make_text(rng, 30),
+                    )
+                )
+            if (i + 1) % 1000 == 0:
+                self.stdout.write(f"{i + 1}/{count} pages")
+        self.stdout.write(
+            f"Created and indexed {count} pages in {time.perf_counter() - start:.0f} s"
+        )
+        return corpus
+
+    def benchmark(self, queries, repeat, operator):
+        backends = {
+            "indexed": get_search_backend(),
+            "fallback": DatabaseSearchBackend({}),
+        }
+        pages = Page.objects.live()
+        self.stdout.write(f"{pages.count()} live pages")
+        for query in queries:
+            row = []
+            for name, backend in backends.items():
+                timings = []
+                for _ in range(max(1, repeat)):
+                    start = time.perf_counter()
+                    results = backend.search(query, pages, operator=operator)
+                    first_page = list(results[:10])
+                    total = results.count()
+                    timings.append(time.perf_counter() - start)
+                row.append(
+                    f"{name} {statistics.median(timings) * 1000:8.1f} ms "
+                    f"({total} hits, top: {first_page[0].title if first_page else '-'})"
+                )
+            self.stdout.write(f"{query!r}\n    " + "\n    ".join(row))
@@ -0,0 +1,87 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from search.indexing import DEFAULT_CHUNK_SIZE, process_index_queue, rebuild_index
+from search.models import QueuedIndexUpdate
+
+
+class Command(BaseCommand):
+    help = (
+        "Index the pages, images and documents queued as changed when "
+        "SEARCH_INDEX_QUEUE is on. Runs until the queue is empty, or with "
+        "--loop keeps polling it. --rebuild instead rebuilds the whole "
+        "index, spread over --processes worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Queued updates indexed per transaction (default: SEARCH_INDEX_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, checking the queue every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait when the queue is empty (default: 5).",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Rebuild the whole index instead of working through the queue.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Worker processes for --rebuild, each taking chunks of one content type at a time (default: 1).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Objects per --rebuild chunk (default: {DEFAULT_CHUNK_SIZE}).",
+        )
+        parser.add_argument("--backend", help="Rebuild only this backend.")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            return self.rebuild(options)
+
+        while True:
+            indexed = process_index_queue(options["batch_size"])
+            if indexed:
+                self.stdout.write(f"Indexed {indexed} queued updates")
+                continue
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
+
+    def rebuild(self, options):
+        backend_names = list(settings.WAGTAILSEARCH_BACKENDS)
+        if options["backend"]:
+            backend_names = [options["backend"]]
+        # Anything queued before now is covered by the rebuild.
+        started = timezone.now()
+        start = time.perf_counter()
+        for backend_name in backend_names:
+            try:
+                rebuild_index(
+                    backend_name,
+                    processes=options["processes"],
+                    chunk_size=options["chunk_size"],
+                    log=self.stdout.write,
+                )
+            except ValueError as error:
+                raise CommandError(error)
+        if set(backend_names) == set(settings.WAGTAILSEARCH_BACKENDS):
+            QueuedIndexUpdate.objects.filter(queued_at__lte=started).delete()
+        self.stdout.write(f"Rebuilt in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueuedIndexUpdate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.CharField(max_length=50)),
+                ("queued_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Queued index update",
+                "indexes": [
+                    models.Index(
+                        fields=["queued_at"], name="search_queu_queued__7ca5aa_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="queuedindexupdate",
+            constraint=models.UniqueConstraint(
+                fields=("content_type", "object_id"), name="unique_queued_index_update"
+            ),
+        ),
+    ]
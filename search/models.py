@@ -0,0 +1,29 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedIndexUpdate(models.Model):
+    """
+    An object saved or deleted since the search index last caught up with
+    it, waiting for the update_search_index command. See search/indexing.py.
+    """
+
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name="+"
+    )
+    # A CharField like wagtail's IndexEntry, as not every key is an integer.
+    object_id = models.CharField(max_length=50)
+    queued_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Queued index update"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id"], name="unique_queued_index_update"
+            )
+        ]
+        indexes = [models.Index(fields=["queued_at"])]
+
+    def __str__(self):
+        return f"{self.content_type}: {self.object_id}"
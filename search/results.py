@@ -0,0 +1,113 @@
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+
+from wagtail.contrib.search_promotions.models import SearchPromotion
+from wagtail.images import get_image_model
+from wagtail.models import Page
+from wagtail.search.utils import normalise_query_string
+
+from base.images import get_filter_specs
+
+SEARCH_VERSION_KEY = "search:version"
+SEARCH_RESULTS_CACHE_KEY = "search:results:{}:{}"
+SEARCH_RESULTS_CACHE_TIMEOUT = 60 * 5
+SEARCH_PROMOTIONS_CACHE_KEY = "search:promotions:{}:{}"
+# Nobody pages past this many results; the rest isn't worth ranking.
+SEARCH_RESULTS_LIMIT = 200
+
+
+def normalize_query(query):
+    return " ".join((query or "").lower().split())
+
+
+def get_search_version():
+    """
+    The current version token of cached search results. Publishing,
+    unpublishing, moving or deleting a page, or editing a promoted result,
+    replaces it, so no cached result list outlives a change to the live
+    pages.
+    """
+    version = cache.get(SEARCH_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(SEARCH_VERSION_KEY, version, None):
+            version = cache.get(SEARCH_VERSION_KEY, version)
+    return version
+
+
+def invalidate_search_results():
+    cache.delete(SEARCH_VERSION_KEY)
+
+
+def get_cache_key(template, query):
+    digest = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+    return template.format(get_search_version(), digest)
+
+
+def get_result_ids(query):
+    """
+    The ids of the live pages matching ``query``, best first, cached for a
+    few minutes under the normalized query.
+    """
+    query = normalize_query(query)
+    if not query:
+        return []
+    key = get_cache_key(SEARCH_RESULTS_CACHE_KEY, query)
+    ids = cache.get(key)
+    if ids is None:
+        results = Page.objects.live().only("id").search(query)
+        ids = [page.pk for page in results[:SEARCH_RESULTS_LIMIT]]
+        cache.set(key, ids, SEARCH_RESULTS_CACHE_TIMEOUT)
+    return ids
+
+
+def load_results(ids):
+    """
+    The specific pages of ``ids``, in order: one query for the pages and
+    one per page type, plus their thumbnails with renditions.
+    """
+    pages = Page.objects.live().filter(pk__in=ids).specific().in_bulk()
+    results = [pages[pk] for pk in ids if pk in pages]
+
+    with_image = {}
+    for page in results:
+        if getattr(page, "image_id", None) is not None:
+            with_image.setdefault(type(page), []).append(page)
+    images = get_image_model().objects.prefetch_renditions(
+        *get_filter_specs("thumbnail")
+    )
+    for pages_of_type in with_image.values():
+        prefetch_related_objects(pages_of_type, Prefetch("image", queryset=images))
+    return results
+
+
+def get_promotions(query):
+    """
+    The promoted results editors picked for ``query``, as dicts of title,
+    url and description, cached like the result ids.
+    """
+    query = normalise_query_string(query or "")
+    if not query:
+        return []
+    key = get_cache_key(SEARCH_PROMOTIONS_CACHE_KEY, query)
+    promotions = cache.get(key)
+    if promotions is None:
+        picks = (
+            SearchPromotion.objects.filter(query__query_string=query)
+            .exclude(page__live=False)
+            .select_related("page")
+            .order_by("sort_order")
+        )
+        promotions = [
+            {
+                "title": pick.title,
+                "url": pick.page.get_url() if pick.page else pick.external_link_url,
+                "description": pick.description,
+            }
+            for pick in picks
+        ]
+        cache.set(key, promotions, SEARCH_RESULTS_CACHE_TIMEOUT)
+    return promotions
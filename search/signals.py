@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from wagtail.contrib.search_promotions.models import Query, SearchPromotion
+from wagtail.models import Page
+from wagtail.search.index import get_indexed_models
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+
+from blog.models import BlogListing, Category
+
+from . import autocomplete
+from .indexing import queue_index_update
+from .results import invalidate_search_results
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def page_changed(sender, instance, **kwargs):
+    invalidate_search_results()
+    if isinstance(instance, BlogListing):
+        # Tag and category suggestions link below the listing.
+        autocomplete.record_change("rebuild")
+    else:
+        autocomplete.record_change("page", instance.pk)
+
+
+@receiver(post_page_move)
+@receiver(page_slug_changed)
+def page_moved(sender, instance, **kwargs):
+    invalidate_search_results()
+    # The URLs of everything below the page changed too.
+    autocomplete.record_change("rebuild")
+
+
+@receiver(post_delete)
+def page_deleted(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        invalidate_search_results()
+        autocomplete.record_change("page", instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    autocomplete.record_change("category", instance.pk)
+
+
+@receiver(post_save, sender=SearchPromotion)
+@receiver(post_delete, sender=SearchPromotion)
+@receiver(post_delete, sender=Query)
+def promotion_changed(sender, instance, **kwargs):
+    invalidate_search_results()
+
+
+def index_changed(sender, instance, **kwargs):
+    if getattr(settings, "SEARCH_INDEX_QUEUE", False):
+        queue_index_update(instance)
+
+
+for model in get_indexed_models():
+    if getattr(model, "search_auto_update", True):
+        post_save.connect(index_changed, sender=model)
+        post_delete.connect(index_changed, sender=model)
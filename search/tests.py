@@ -0,0 +1,240 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from wagtail.contrib.search_promotions.models import Query
+from wagtail.models import Page
+from wagtail.search.models import IndexEntry
+
+from base.models import StandardPage
+
+from blog.models import BlogListing, BlogPage
+from home.models import HomePage
+
+from . import autocomplete, hits
+from .autocomplete import PrefixIndex, make_suggestion
+from .indexing import process_index_queue, rebuild_index
+from .models import QueuedIndexUpdate
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.add(("page", 1), make_suggestion("page", "iPhone screen repair", "/a/"))
+        self.index.add(("page", 2), make_suggestion("page", "Screen protectors", "/b/"))
+        self.index.add(("tag", 3), make_suggestion("tag", "screens", "/c/"))
+
+    def labels(self, query, limit=8):
+        return [suggestion["label"] for suggestion in self.index.search(query, limit)]
+
+    def test_matches_any_word(self):
+        self.assertEqual(self.labels("iph"), ["iPhone screen repair"])
+        self.assertEqual(self.labels("rep"), ["iPhone screen repair"])
+        self.assertEqual(self.labels("screen rep"), ["iPhone screen repair"])
+
+    def test_ranking(self):
+        # Label starts first, then pages before tags, then shorter labels.
+        self.assertEqual(
+            self.labels("scr"),
+            ["Screen protectors", "screens", "iPhone screen repair"],
+        )
+        self.assertEqual(self.labels("scr", limit=1), ["Screen protectors"])
+
+    def test_update_and_remove(self):
+        self.index.add(("page", 2), make_suggestion("page", "Cases", "/b/"))
+        self.assertEqual(self.labels("protec"), [])
+        self.assertEqual(self.labels("cas"), ["Cases"])
+        self.index.remove(("page", 1))
+        self.assertEqual(self.labels("iph"), [])
+        self.assertEqual(len(self.index), 2)
+
+
+class AutocompleteIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        autocomplete._index = autocomplete._seq = None
+        self.listing = BlogListing(title="Blog", slug="blog")
+        HomePage.objects.get().add_child(instance=self.listing)
+        self.post = BlogPage(title="iPhone batteries", slug="iphone")
+        self.listing.add_child(instance=self.post)
+        self.post.save_revision().publish()
+
+    def urls(self, query):
+        return [suggestion["url"] for suggestion in autocomplete.suggest(query)]
+
+    def test_catches_up_without_rebuilding(self):
+        self.assertEqual(self.urls("iph"), ["/blog/iphone/"])
+        post = BlogPage(title="iPad screens", slug="ipad")
+        self.listing.add_child(instance=post)
+        with mock.patch.object(autocomplete, "build_index") as build_index:
+            post.save_revision().publish()
+            self.assertEqual(self.urls("ipa"), ["/blog/ipad/"])
+            post.unpublish()
+            self.assertEqual(self.urls("ipa"), [])
+        build_index.assert_not_called()
+
+    def test_rebuilds_when_a_change_is_missing(self):
+        autocomplete.get_index()
+        autocomplete.record_change("page", self.post.pk)
+        seq = cache.get(autocomplete.AUTOCOMPLETE_SEQ_KEY)
+        cache.delete(autocomplete.AUTOCOMPLETE_CHANGE_KEY.format(seq))
+        with mock.patch.object(
+            autocomplete, "build_index", wraps=autocomplete.build_index
+        ) as build_index:
+            self.assertEqual(self.urls("iph"), ["/blog/iphone/"])
+        build_index.assert_called_once()
+
+    def test_renamed_listing_moves_its_suggestions(self):
+        self.post.tags.add("iphones")
+        self.post.save_revision().publish()
+        self.assertEqual(self.urls("iph"), ["/blog/iphone/", "/blog/tags/iphones/"])
+        self.listing.slug = "news"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.save_revision().publish()
+        self.assertEqual(self.urls("iph"), ["/news/iphone/", "/news/tags/iphones/"])
+
+
+@override_settings(
+    SEARCH_AUTOCOMPLETE_RATE_LIMIT=1,
+    SEARCH_AUTOCOMPLETE_CLIENT_HEADER="HTTP_X_FORWARDED_FOR",
+    SEARCH_AUTOCOMPLETE_TRUSTED_PROXIES=1,
+)
+class AutocompleteThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get(self, forwarded_for):
+        return self.client.get(
+            "/search/autocomplete/", {"q": "ip"}, HTTP_X_FORWARDED_FOR=forwarded_for
+        ).status_code
+
+    def test_clients_behind_a_proxy_are_throttled_separately(self):
+        self.assertEqual(self.get("10.0.0.1"), 200)
+        self.assertEqual(self.get("10.0.0.2"), 200)
+        self.assertEqual(self.get("10.0.0.1"), 429)
+        # Only the address the proxy appended counts, not a forged one.
+        self.assertEqual(self.get("1.2.3.4, 10.0.0.1"), 429)
+
+
+@override_settings(SEARCH_HITS_FLUSH_INTERVAL=3600)
+class SearchHitTests(TestCase):
+    def setUp(self):
+        hits._hits.clear()
+        # Background flushes run at once, on the test's connection.
+        for patcher in (
+            mock.patch.object(hits, "_executor", mock.Mock(submit=lambda fn: fn())),
+            mock.patch.object(hits, "_flush_scheduled", False),
+            mock.patch.object(hits.connection, "close"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_hits_are_written_in_bulk(self):
+        for query in ["Screen", "screen ", "battery", "screen"]:
+            hits.record_hit(query)
+        self.assertFalse(Query.objects.exists())
+        # Four statements, between the savepoint and its release.
+        with self.assertNumQueries(6):
+            self.assertEqual(hits.flush_hits(), 4)
+        hits.record_hit("screen")
+        hits.flush_hits()
+        self.assertEqual(Query.get("screen").hits, 4)
+        self.assertEqual(Query.get("battery").hits, 1)
+
+    @override_settings(SEARCH_HITS_FLUSH_INTERVAL=0)
+    def test_flushed_in_the_background_when_due(self):
+        with mock.patch.object(hits._executor, "submit") as submit:
+            self.client.get("/search/", {"query": "screen"})
+        submit.assert_called_once_with(hits.flush_hits_in_background)
+        self.assertFalse(Query.objects.exists())
+        hits.flush_hits_in_background()
+        self.assertEqual(Query.get("screen").hits, 1)
+        hits.connection.close.assert_called_once_with()
+
+    @override_settings(SEARCH_HITS_FLUSH_INTERVAL=0)
+    def test_write_errors_are_logged_and_kept(self):
+        with mock.patch.object(hits, "write_hits", side_effect=DatabaseError):
+            with self.assertLogs("search.hits", "ERROR"):
+                response = self.client.get("/search/", {"query": "screen"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(hits._hits.values()), 1)
+        hits.flush_hits()
+        self.assertEqual(Query.get("screen").hits, 1)
+
+
+QUEUED_BACKENDS = {
+    "default": {**settings.WAGTAILSEARCH_BACKENDS["default"], "AUTO_UPDATE": False}
+}
+
+
+@override_settings(SEARCH_INDEX_QUEUE=True, WAGTAILSEARCH_BACKENDS=QUEUED_BACKENDS)
+class IndexQueueTests(TestCase):
+    def setUp(self):
+        self.home = HomePage.objects.get()
+
+    def add_page(self, title, slug):
+        page = StandardPage(title=title, slug=slug)
+        self.home.add_child(instance=page)
+        return page
+
+    def search(self, query):
+        return [page.pk for page in Page.objects.live().search(query)]
+
+    def test_saves_are_queued_then_indexed(self):
+        page = self.add_page("Zanzibar repairs", "zanzibar")
+        page.save_revision().publish()
+        self.assertEqual(
+            list(QueuedIndexUpdate.objects.values_list("object_id", flat=True)),
+            [str(page.pk)],
+        )
+        self.assertEqual(self.search("zanzibar"), [])
+
+        self.assertEqual(process_index_queue(), 1)
+        self.assertFalse(QueuedIndexUpdate.objects.exists())
+        self.assertEqual(self.search("zanzibar"), [page.pk])
+
+    def test_deleted_pages_leave_the_index(self):
+        page = self.add_page("Zanzibar repairs", "zanzibar")
+        process_index_queue()
+        page.delete()
+        process_index_queue()
+        self.assertFalse(IndexEntry.objects.filter(object_id=str(page.pk)).exists())
+
+    def test_failed_batch_is_queued_again(self):
+        self.add_page("Zanzibar repairs", "zanzibar")
+        with mock.patch(
+            "search.indexing.index_objects", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            process_index_queue()
+        self.assertEqual(QueuedIndexUpdate.objects.count(), 1)
+        self.assertEqual(process_index_queue(), 1)
+
+    def test_batches_are_limited(self):
+        for i in range(3):
+            self.add_page(f"Page {i}", f"page-{i}")
+        self.assertEqual(process_index_queue(batch_size=2), 2)
+        self.assertEqual(process_index_queue(batch_size=2), 1)
+        self.assertEqual(process_index_queue(batch_size=2), 0)
+
+    def test_rebuild(self):
+        for i in range(5):
+            self.add_page(f"Quokka {i}", f"quokka-{i}")
+        IndexEntry.objects.all().delete()
+        call_command(
+            "update_search_index", "--rebuild", "--chunk-size=2", stdout=mock.Mock()
+        )
+        self.assertFalse(QueuedIndexUpdate.objects.exists())
+        self.assertEqual(len(self.search("quokka")), 5)
+
+    @override_settings(
+        WAGTAILSEARCH_BACKENDS={
+            "default": {**QUEUED_BACKENDS["default"], "ATOMIC_REBUILD": True}
+        }
+    )
+    def test_atomic_rebuild_runs_in_one_process(self):
+        with self.assertRaises(ValueError):
+            rebuild_index(processes=2)
@@ -1,14 +1,19 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import JsonResponse
 from django.template.response import TemplateResponse
+from django.utils.cache import patch_cache_control
 
-from wagtail.models import Page
-
-# To enable logging of search queries for use with the "Promoted search results" module
-# <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
-# uncomment the following line and the lines indicated in the search function
-# (after adding wagtail.contrib.search_promotions to INSTALLED_APPS):
+from .autocomplete import suggest
+from .highlight import get_search_text, highlight
+from .hits import record_hit
+from .results import get_promotions, get_result_ids, load_results, normalize_query
 
-# from wagtail.contrib.search_promotions.models import Query
+AUTOCOMPLETE_THROTTLE_KEY = "search:autocomplete:throttle:{}:{}"
+AUTOCOMPLETE_MAX_LIMIT = 20
 
 
 def search(request):
@@ -17,15 +22,18 @@ def search(request):
 
     # Search
     if search_query:
-        search_results = Page.objects.live().search(search_query)
+        search_results = get_result_ids(search_query)
+        promotions = get_promotions(search_query)
 
-        # To log this query for use with the "Promoted search results" module:
-
-        # query = Query.get(search_query)
-        # query.add_hit()
+        # Counted for the "Promoted search results" module's popular
+        # queries, and written in bulk in the background (search/hits.py).
+        # Paging through the results doesn't count again.
+        if "page" not in request.GET:
+            record_hit(search_query)
 
     else:
-        search_results = Page.objects.none()
+        search_results = []
+        promotions = []
 
     # Pagination
     paginator = Paginator(search_results, 10)
@@ -36,11 +44,73 @@ def search(request):
     except EmptyPage:
         search_results = paginator.page(paginator.num_pages)
 
+    search_results.object_list = load_results(search_results.object_list)
+    for result in search_results:
+        result.snippet = highlight(get_search_text(result), search_query)
+
     return TemplateResponse(
         request,
         "search/search.html",
         {
             "search_query": search_query,
             "search_results": search_results,
+            "search_promotions": promotions,
         },
     )
+
+
+def get_client_address(request):
+    """
+    The client's address, from SEARCH_AUTOCOMPLETE_CLIENT_HEADER. Behind
+    proxies that is X-Forwarded-For, to which each proxy appends the address
+    it was reached from, so the client is SEARCH_AUTOCOMPLETE_TRUSTED_PROXIES
+    entries from the end; anything before it could be forged.
+    """
+    header = getattr(settings, "SEARCH_AUTOCOMPLETE_CLIENT_HEADER", "REMOTE_ADDR")
+    addresses = [
+        address.strip()
+        for address in request.META.get(header, "").split(",")
+        if address.strip()
+    ]
+    proxies = max(getattr(settings, "SEARCH_AUTOCOMPLETE_TRUSTED_PROXIES", 1), 1)
+    if len(addresses) >= proxies:
+        return addresses[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def is_throttled(request):
+    """
+    Whether this client has made more than SEARCH_AUTOCOMPLETE_RATE_LIMIT
+    autocomplete requests this minute.
+    """
+    limit = getattr(settings, "SEARCH_AUTOCOMPLETE_RATE_LIMIT", 0)
+    if not limit:
+        return False
+    window = int(time.time() // 60)
+    key = AUTOCOMPLETE_THROTTLE_KEY.format(get_client_address(request), window)
+    cache.add(key, 0, 60)
+    try:
+        return cache.incr(key) > limit
+    except ValueError:
+        return False
+
+
+def autocomplete(request):
+    """
+    Suggestions for the search box: live page titles, blog tags and
+    categories with a word starting with ``q``, served from an in-memory
+    index without database queries.
+    """
+    if is_throttled(request):
+        return JsonResponse({"error": "Too many requests"}, status=429)
+
+    query = request.GET.get("q", "")
+    try:
+        limit = min(int(request.GET.get("limit", 8)), AUTOCOMPLETE_MAX_LIMIT)
+    except ValueError:
+        limit = 8
+    suggestions = suggest(query, limit) if len(normalize_query(query)) >= 2 else []
+
+    response = JsonResponse({"query": query, "suggestions": suggestions})
+    patch_cache_control(response, public=True, max_age=60)
+    return response
@@ -61,6 +61,7 @@ MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "base.sites.SiteResolutionMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -104,6 +105,8 @@ if DEVELOPMENT_MODE:
             "NAME": os.path.join(BASE_DIR, "phonecentredb"),
         }
     }
+elif "DATABASE_URL" in os.environ:
+    DATABASES = {"default": dj_database_url.parse(os.environ["DATABASE_URL"])}
 else:
     DATABASES = {
         "default": {
@@ -111,11 +114,44 @@ else:
             "NAME": os.environ.get("DATABASE_NAME"),
             "USER": os.environ.get("DATABASE_USER"),
             "PASSWORD": os.environ.get("DATABASE_PASSWORD"),
-            "HOST": "localhost",
-            "PORT": "",
+            "HOST": os.environ.get("DATABASE_HOST", "localhost"),
+            "PORT": os.environ.get("DATABASE_PORT", ""),
         }
     }
 
+# Keep each worker's connection open between requests for
+# DATABASE_CONN_MAX_AGE seconds (0 closes it after every request), and
+# check it still works before reusing it, so a restarted database or a
+# dropped connection costs one reconnect rather than a failed request.
+# https://docs.djangoproject.com/en/5.0/ref/databases/#persistent-connections
+DATABASES["default"]["CONN_MAX_AGE"] = int(
+    os.environ.get("DATABASE_CONN_MAX_AGE", 600)
+)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Behind PgBouncer in transaction mode a connection can change between
+# queries, which server-side cursors (used by QuerySet.iterator()) don't
+# survive.
+if int(os.environ.get("DATABASE_EXTERNAL_POOLER", 0)):
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+# DATABASE_POOL="min:max" uses a psycopg connection pool per worker
+# instead of one persistent connection per thread. This needs Django 5.1
+# or later with psycopg 3 installed in place of psycopg2-binary.
+if os.environ.get("DATABASE_POOL"):
+    import django
+    from django.core.exceptions import ImproperlyConfigured
+
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured("DATABASE_POOL needs Django 5.1 and psycopg 3.")
+    min_size, _, max_size = os.environ["DATABASE_POOL"].partition(":")
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": int(min_size),
+        "max_size": int(max_size or min_size),
+    }
+    # Pooled connections go back to the pool after each request.
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -195,14 +231,151 @@ WAGTAIL_CONTENT_LANGUAGES = LANGUAGES = [
 ]
 
 
+# Caches
+# "default" is a small per-process LRU (base.cache.TieredCache) in front of
+# the "shared" cache that all workers use, picked with CACHE_BACKEND:
+# "locmem" (per process, the default in DEVELOPMENT_MODE), "file" (the
+# default otherwise), "redis" or "memcached" at CACHE_LOCATION. Workers on
+# more than one host need redis or memcached; check warning base.W001 flags
+# locmem outside DEBUG and DEVELOPMENT_MODE. Local copies live for
+# CACHE_LOCAL_TIMEOUT seconds, which bounds how long another worker's
+# invalidation can take to be seen.
+# Shared keys are prefixed with CACHE_KEY_PREFIX, or the RELEASE being
+# deployed, so a deploy never reads entries pickled by the previous code.
+# Hit counts per worker are shown at base/metrics/.
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "phonecentre"),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        "/var/tmp/phonecentre-cache",
+    ),
+    "redis": (
+        "django.core.cache.backends.redis.RedisCache",
+        "redis://127.0.0.1:6379/1",
+    ),
+    "memcached": (
+        "django.core.cache.backends.memcached.PyMemcacheCache",
+        "127.0.0.1:11211",
+    ),
+}
+CACHE_BACKEND = os.environ.get(
+    "CACHE_BACKEND", "locmem" if DEVELOPMENT_MODE else "file"
+)
+CACHES = {
+    "default": {
+        "BACKEND": "base.cache.TieredCache",
+        "LOCATION": "default",
+        "OPTIONS": {
+            "SHARED": "shared",
+            # A second in-process copy of a process-local cache gains nothing.
+            "LOCAL_TIMEOUT": 0
+            if CACHE_BACKEND == "locmem"
+            else int(os.environ.get("CACHE_LOCAL_TIMEOUT", 5)),
+            "LOCAL_MAX_ENTRIES": int(os.environ.get("CACHE_LOCAL_MAX_ENTRIES", 1000)),
+        },
+    },
+    "shared": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": os.environ.get("CACHE_LOCATION", CACHE_BACKENDS[CACHE_BACKEND][1]),
+        "KEY_PREFIX": os.environ.get("CACHE_KEY_PREFIX", os.environ.get("RELEASE", "")),
+        "TIMEOUT": int(os.environ.get("CACHE_TIMEOUT", 300)),
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 10000))}
+        if CACHE_BACKEND in ("locmem", "file")
+        else {},
+    },
+}
+
+
+# Page cache
+# Whole-response cache for anonymous visitors of HomePage and BlogPage,
+# purged by the content each cached page depends on. See base/page_cache.py.
+PAGE_CACHE_ENABLED = bool(int(os.environ.get("PAGE_CACHE_ENABLED", 0)))
+PAGE_CACHE_TIMEOUT = int(os.environ.get("PAGE_CACHE_TIMEOUT", 60 * 60))
+
+# Images
+# Generate the renditions of base/images.py IMAGE_POLICIES in a background
+# thread when an image is saved, rather than on its first page view.
+IMAGE_PREGENERATE_RENDITIONS = bool(
+    int(os.environ.get("IMAGE_PREGENERATE_RENDITIONS", 1))
+)
+
+# Dynamic image URLs (images/...) are answered from a content-addressed
+# copy of each rendition in IMAGE_SERVE_CACHE_DIR. Set IMAGE_SERVE_SENDFILE
+# to "x-sendfile" (Apache) or "x-accel-redirect" (nginx, with an internal
+# location at IMAGE_SERVE_ACCEL_PREFIX aliased to the cache dir) to have
+# the web server send the files. Files of changed or deleted images are
+# removed with them; run "manage.py prune_image_cache" daily for the rest.
+# See base/image_serve.py.
+IMAGE_SERVE_CACHE_DIR = os.environ.get(
+    "IMAGE_SERVE_CACHE_DIR", os.path.join(MEDIA_ROOT, "image-cache")
+)
+IMAGE_SERVE_SENDFILE = os.environ.get("IMAGE_SERVE_SENDFILE", "")
+IMAGE_SERVE_ACCEL_PREFIX = os.environ.get("IMAGE_SERVE_ACCEL_PREFIX", "/image-cache/")
+IMAGE_SERVE_MAX_AGE = int(os.environ.get("IMAGE_SERVE_MAX_AGE", 60 * 60 * 24 * 30))
+
+
+# Email queue
+# The contact form and form pages queue their emails in the database;
+# "manage.py send_queued_email --loop" sends them in batches of
+# EMAIL_QUEUE_BATCH_SIZE. A failed email is retried after
+# EMAIL_QUEUE_RETRY_DELAY seconds, doubling each time, and marked failed
+# after EMAIL_QUEUE_MAX_ATTEMPTS. See base/mail.py.
+EMAIL_QUEUE_BATCH_SIZE = int(os.environ.get("EMAIL_QUEUE_BATCH_SIZE", 50))
+EMAIL_QUEUE_RETRY_DELAY = int(os.environ.get("EMAIL_QUEUE_RETRY_DELAY", 60))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.environ.get("EMAIL_QUEUE_MAX_ATTEMPTS", 8))
+
+
+# Metrics
+# Per-worker counters of database connections opened, requests served and
+# cache hits, logged every METRICS_LOG_EVERY requests (0 to disable) and
+# shown to staff at base/metrics/. See base/metrics.py.
+METRICS_LOG_EVERY = int(os.environ.get("METRICS_LOG_EVERY", 0))
+
+
 # Search
 # https://docs.wagtail.org/en/stable/topics/search/backends.html
+# The database backend picks the engine from the database: on Postgres a
+# tsvector index with GIN indexes, weighted by each search field's boost
+# and stemmed with SEARCH_CONFIG; on SQLite an FTS5 table.
+# With SEARCH_INDEX_QUEUE on, saving or deleting a page, image or document
+# queues it for "manage.py update_search_index --loop" to index in batches
+# of SEARCH_INDEX_BATCH_SIZE, instead of indexing it during the request.
+# "update_search_index --rebuild --processes N" rebuilds the whole index in
+# parallel. See search/indexing.py.
+SEARCH_INDEX_QUEUE = bool(int(os.environ.get("SEARCH_INDEX_QUEUE", 0)))
+SEARCH_INDEX_BATCH_SIZE = int(os.environ.get("SEARCH_INDEX_BATCH_SIZE", 500))
+
 WAGTAILSEARCH_BACKENDS = {
     "default": {
         "BACKEND": "wagtail.search.backends.database",
+        "SEARCH_CONFIG": os.environ.get("SEARCH_CONFIG", "english"),
+        "AUTO_UPDATE": not SEARCH_INDEX_QUEUE,
     }
 }
 
+# Requests per minute one client may make to the search autocomplete
+# endpoint; 0 for no limit. Clients are told apart by the
+# SEARCH_AUTOCOMPLETE_CLIENT_HEADER request header: behind a reverse proxy
+# or load balancer set it to "HTTP_X_FORWARDED_FOR" and
+# SEARCH_AUTOCOMPLETE_TRUSTED_PROXIES to the number of proxies in front of
+# gunicorn, or every visitor shares the proxy's limit.
+SEARCH_AUTOCOMPLETE_RATE_LIMIT = int(
+    os.environ.get("SEARCH_AUTOCOMPLETE_RATE_LIMIT", 120)
+)
+SEARCH_AUTOCOMPLETE_CLIENT_HEADER = os.environ.get(
+    "SEARCH_AUTOCOMPLETE_CLIENT_HEADER", "REMOTE_ADDR"
+)
+SEARCH_AUTOCOMPLETE_TRUSTED_PROXIES = int(
+    os.environ.get("SEARCH_AUTOCOMPLETE_TRUSTED_PROXIES", 1)
+)
+
+# Search queries are counted in each worker and written to the promoted
+# search results tables by a background thread every
+# SEARCH_HITS_FLUSH_INTERVAL seconds, or sooner once SEARCH_HITS_MAX_BUFFERED
+# different queries are waiting. See search/hits.py.
+SEARCH_HITS_FLUSH_INTERVAL = int(os.environ.get("SEARCH_HITS_FLUSH_INTERVAL", 60))
+SEARCH_HITS_MAX_BUFFERED = int(os.environ.get("SEARCH_HITS_MAX_BUFFERED", 1000))
+
 # Base URL to use when referring to full URLs within the Wagtail admin backend -
 # e.g. in notification emails. Don't include '/admin' or a trailing slash
 # WAGTAILADMIN_BASE_URL = "http://example.com"
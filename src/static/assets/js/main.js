@@ -212,4 +212,29 @@
     }
   });
 
+  /**
+   * Search suggestions for inputs with a data-autocomplete-url
+   */
+  select('input[data-autocomplete-url]', true).forEach(input => {
+    const list = document.getElementById(input.getAttribute('list'))
+    let timer
+    input.addEventListener('input', () => {
+      clearTimeout(timer)
+      timer = setTimeout(() => {
+        if (input.value.trim().length < 2) return
+        const url = new URL(input.dataset.autocompleteUrl, window.location.href)
+        url.searchParams.set('q', input.value)
+        fetch(url)
+          .then(response => response.ok ? response.json() : {suggestions: []})
+          .then(data => {
+            list.replaceChildren(...data.suggestions.map(suggestion => {
+              const option = document.createElement('option')
+              option.value = suggestion.label
+              return option
+            }))
+          })
+      }, 100)
+    })
+  });
+
 })()
\ No newline at end of file
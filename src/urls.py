@@ -7,7 +7,7 @@ from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.contrib.sitemaps.views import sitemap
 from wagtail.documents import urls as wagtaildocs_urls
-from wagtail.images.views.serve import ServeView
+from base.image_serve import CachedServeView
 from search import views as search_views
 
 urlpatterns = [
@@ -15,11 +15,16 @@ urlpatterns = [
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
     path("search/", search_views.search, name="search"),
+    path(
+        "search/autocomplete/",
+        search_views.autocomplete,
+        name="search_autocomplete",
+    ),
     path("base/", include("base.urls")),
 
     re_path(
         r"^images/([^/]*)/(\d*)/([^/]*)/[^/]*$",
-        ServeView.as_view(),
+        CachedServeView.as_view(),
         name="wagtailimages_serve",
     ),
     path("sitemap.xml", sitemap),